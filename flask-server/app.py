@@ -4,19 +4,34 @@ Handles receipt processing using Tesseract OCR
 """
 
 import os
+import json
+import time
 import logging
-from flask import Flask, request, jsonify
+from concurrent.futures import FIRST_COMPLETED, TimeoutError as FutureTimeoutError, wait
+from flask import Flask, Request, Response, current_app, request, jsonify, stream_with_context
 from datetime import datetime
 from flask_cors import CORS
 from dotenv import load_dotenv
 from werkzeug.utils import secure_filename
 from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.security import generate_password_hash
-import tempfile
 import shutil
 from bson import ObjectId
 from ocr_service import OCRProcessor
-from pymongo import MongoClient
+from ocr_pool import OCRWorkerPool, OCRPoolBusyError, OCRPoolTimeoutError
+from ocr_cache import OCRResultCache
+from ocr_jobs import OCRJobQueue, OCRJobQueueFullError
+from preprocessing import PreprocessingPipeline
+from metrics import (MetricsRegistry, MongoCommandMetrics, OCRMetrics, RequestMetrics, metrics_enabled,
+                     metrics_response, stats_collector)
+from profiler import RequestProfiler
+from pagination import InvalidCursorError, paginate, paginate_by_text_score
+from transaction_stats import get_transaction_stats as aggregate_transaction_stats
+from search import (PREFIX, backfill_search_tokens, search_filter, search_tokens, touches_search_fields,
+                    validate_search_mode)
+from count_cache import CountCache
+from db_indexes import ensure_indexes, ensure_indexes_at_startup, index_report
+from pymongo import MongoClient, ReturnDocument
 import traceback
 from io import BytesIO
 from datetime import datetime
@@ -24,9 +39,15 @@ from flask import jsonify
 import uuid
 
 
+# Process-local metrics served on /metrics
+metrics = MetricsRegistry()
+METRICS_ENABLED = metrics_enabled()
+
 # Connect to MongoDB
 mongo_uri = os.getenv('MONGO_URI', 'mongodb://localhost:27017/finly')
-client = MongoClient(mongo_uri)
+# connect=False defers connecting to first use, so a preloaded app forks cleanly
+client = MongoClient(mongo_uri, connect=False,
+                     event_listeners=[MongoCommandMetrics(metrics)] if METRICS_ENABLED else [])
 
 # Define the database and collection
 db = client['finly']
@@ -34,17 +55,46 @@ categories = db['categories']
 users = db['users']
 transactions = db['transactions']
 
+# Listing totals, cached per user and filter until the user's transactions change
+count_cache = CountCache()
+
 # Load environment variables
 load_dotenv()
 
+# Create indexes at startup unless disabled (gunicorn does this in its master)
+ENSURE_INDEXES = os.getenv('MONGO_ENSURE_INDEXES', 'true').lower() == 'true'
+
+# Endpoints whose request bodies may reach BATCH_MAX_BYTES instead of MAX_CONTENT_LENGTH
+BATCH_UPLOAD_ENDPOINTS = {'process_receipts'}
+
+class InMemoryRequest(Request):
+    """Request that keeps uploaded files in memory instead of spooling them to disk"""
+
+    @property
+    def max_content_length(self):
+        """Body size limit of the matched endpoint, so only batch uploads may be large"""
+        if self.endpoint in BATCH_UPLOAD_ENDPOINTS:
+            return current_app.config['BATCH_MAX_BYTES']
+        return current_app.config['MAX_CONTENT_LENGTH']
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        # Uploads are bounded by max_content_length
+        return BytesIO()
+
+
 # Initialize Flask app
 app = Flask(__name__)
+app.request_class = InMemoryRequest
 
 # Configure CORS
 CORS(app, origins=['http://localhost:3000', 'http://localhost:5000'])
 
 # Configuration
-app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_CONTENT_LENGTH', 10 * 1024 * 1024))  # 10MB
+app.config['MAX_FILE_SIZE'] = int(os.getenv('MAX_CONTENT_LENGTH', 10 * 1024 * 1024))  # 10MB per receipt
+app.config['BATCH_MAX_FILES'] = int(os.getenv('OCR_BATCH_MAX_FILES', 50))
+app.config['BATCH_MAX_BYTES'] = int(os.getenv('OCR_BATCH_MAX_BYTES', 100 * 1024 * 1024))  # 100MB per batch
+app.config['TEXT_BATCH_MAX_ROWS'] = int(os.getenv('OCR_TEXT_BATCH_MAX_ROWS', 50000))
+app.config['MAX_CONTENT_LENGTH'] = app.config['MAX_FILE_SIZE']
 app.config['UPLOAD_FOLDER'] = os.getenv('UPLOAD_FOLDER', 'uploads')
 
 # Setup logging
@@ -54,6 +104,39 @@ logger = logging.getLogger(__name__)
 # Initialize OCR processor
 ocr_processor = OCRProcessor()
 
+# Worker pool for receipt OCR (processes start on first use)
+ocr_pool = OCRWorkerPool()
+
+# Cache of OCR results keyed by upload contents and OCR configuration
+ocr_cache = OCRResultCache()
+
+# Background OCR jobs for large receipts (results polled by job ID)
+ocr_jobs = OCRJobQueue()
+app.config['JOBS_TIMEOUT'] = float(os.getenv('OCR_JOBS_TIMEOUT', 600))
+app.config['JOBS_MAX_WAIT'] = float(os.getenv('OCR_JOBS_MAX_WAIT', 30))
+
+# Request, OCR stage and component metrics
+ocr_metrics = OCRMetrics(metrics)
+if METRICS_ENABLED:
+    RequestMetrics(metrics).init_app(app)
+    metrics.register_collector(stats_collector(
+        'ocr_cache', ocr_cache.stats, counters=['memoryHits', 'diskHits', 'misses', 'evictions'],
+        gauges=['hitRate', 'memoryEntries', 'diskBytes']))
+    metrics.register_collector(stats_collector('ocr_pool', ocr_pool.stats, counters=['rejected'],
+                                               gauges=['size', 'inFlight']))
+    metrics.register_collector(stats_collector('ocr_jobs', ocr_jobs.stats,
+                                               gauges=['queued', 'processing', 'completed', 'failed']))
+    metrics.register_collector(stats_collector(
+        'ocr_date_cache', lambda: ocr_processor._parse_date_cached.cache_info()._asdict(),
+        counters=['hits', 'misses'], gauges=['currsize']))
+    metrics.register_collector(stats_collector('count_cache', count_cache.stats,
+                                               counters=['hits', 'misses', 'invalidations'],
+                                               gauges=['hitRate', 'entries']))
+
+# Opt-in sampling profiler (PROFILER_ENABLED with PROFILER_TOKEN)
+profiler = RequestProfiler()
+profiler.init_app(app)
+
 # Ensure upload directory exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
@@ -65,12 +148,94 @@ def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def file_too_large_message():
+    """Message for uploads over the per-file size limit"""
+    return f"File size too large. Maximum size is {app.config['MAX_FILE_SIZE'] / (1024 * 1024):.0f}MB."
+
+def request_flag(name):
+    """Whether a form field or query parameter is set to 'true'"""
+    return (request.form.get(name) or request.args.get(name, '')).lower() == 'true'
+
+def parse_ocr_options():
+    """
+    Read optional per-request OCR settings
+    
+    Returns:
+        dict: process_receipt keyword arguments (preprocess_stages as a
+            canonical spec or None, debug, structured)
+    
+    Raises:
+        ValueError: If an unknown preprocessing stage is requested
+    """
+    stages = request.form.get('stages') or request.args.get('stages')
+    if stages is not None:
+        stages = PreprocessingPipeline.parse(stages).spec
+    return {
+        'preprocess_stages': stages,
+        'debug': request_flag('debug'),
+        'structured': request_flag('structured')
+    }
+
+def parse_date_order(data):
+    """
+    Read the optional dateOrder hint from a JSON body
+    
+    Returns:
+        str: Normalized date order, or None to use the configured default
+    
+    Raises:
+        ValueError: If the date order is not supported
+    """
+    date_order = data.get('dateOrder')
+    if date_order is None:
+        return None
+    return ocr_processor._validate_date_order(str(date_order))
+
+def ocr_call_options(options):
+    """
+    process_receipt keyword arguments sent to the pool
+    
+    Stage timings only leave the worker in debug output, so it is requested
+    whenever metrics are on and removed again by finish_ocr_result.
+    """
+    return dict(options, debug=True) if METRICS_ENABLED else options
+
+def finish_ocr_result(result, options):
+    """Record a pool result's stage timings and drop debug output nobody asked for"""
+    if METRICS_ENABLED:
+        ocr_metrics.observe_result(result)
+        if not options['debug']:
+            result.pop('debug', None)
+    return result
+
+def receipt_cache_key(file_bytes, file_extension, options):
+    """Cache key for an upload processed with the current OCR configuration"""
+    request_settings = json.dumps({name: value for name, value in options.items() if name != 'debug'}, sort_keys=True)
+    fingerprint = file_extension + ocr_processor.config_fingerprint() + request_settings
+    return ocr_cache.make_key(file_bytes, fingerprint)
+
+@app.cli.command('ensure-indexes')
+def ensure_indexes_command():
+    """Create missing MongoDB indexes from the registry in db_indexes.py"""
+    print(json.dumps(ensure_indexes(db), indent=2))
+
+@app.cli.command('index-report')
+def index_report_command():
+    """Report missing, unused and undeclared MongoDB indexes and query plans"""
+    print(json.dumps(index_report(db), indent=2, default=str))
+
+@app.cli.command('backfill-search-tokens')
+def backfill_search_tokens_command():
+    """Compute searchTokens for transactions stored before search indexing"""
+    print(f"Indexed {backfill_search_tokens(transactions)} transactions for search")
+
 @app.errorhandler(RequestEntityTooLarge)
 def handle_file_too_large(error):
-    """Handle file size too large error"""
+    """Handle request body over the size limit of its endpoint"""
+    limit = request.max_content_length
     return jsonify({
         'success': False,
-        'message': 'File size too large. Maximum size is 10MB.'
+        'message': f"Request too large. Maximum size is {limit / (1024 * 1024):.0f}MB."
     }), 413
 
 @app.errorhandler(500)
@@ -102,7 +267,9 @@ def serialize_transaction(tx):
         "date": tx.get("date").isoformat() if isinstance(tx.get("date"), datetime) else tx.get("date"),
         "description": tx.get("description"),
         "paymentMethod": tx.get("paymentMethod"),
-        "tags": tx.get("tags", [])
+        "tags": tx.get("tags", []),
+        **({"merchant": tx["merchant"]} if tx.get("merchant") else {}),
+        **({"score": round(tx["score"], 4)} if "score" in tx else {})
     }
 
 
@@ -314,6 +481,18 @@ def get_transactions():
         page = int(request.args.get('page', 1))
         limit = int(request.args.get('limit', 10))
         skip = (page - 1) * limit
+        after = request.args.get('after')
+        search = (request.args.get('search') or '').strip()
+
+        try:
+            search_mode = validate_search_mode(request.args.get('searchMode', PREFIX))
+        except ValueError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
+        # Indexed word-prefix match (or $text), never user input as a regex
+        search_query = search_filter(search, search_mode) if search else {}
+        ranked = '$text' in search_query
+        if ranked and after:
+            return jsonify({"success": False, "message": "Text search results are ranked; use page instead of after"}), 400
 
         query = {"user_id": user_id}  # Filter by user_id
 
@@ -338,20 +517,25 @@ def get_transactions():
         if request.args.get('tags'):
             tags = request.args.get('tags').split(',')
             query['tags'] = {'$in': tags}
-        if request.args.get('search'):
-            query['description'] = {
-                '$regex': request.args.get('search'),
-                '$options': 'i'
-            }
+        query.update(search_query)
 
         # Sorting
         sort_by = request.args.get('sortBy', 'date')
         sort_order = -1 if request.args.get('sortOrder', 'desc') == 'desc' else 1
 
-        # Query DB
-        total_items = transactions.count_documents(query)
-        cursor = transactions.find(query).sort(sort_by, sort_order).skip(skip).limit(limit)
-        transaction_list = list(cursor)
+        # Query DB: an 'after' cursor continues from the previous page instead of skipping
+        try:
+            if ranked:
+                transaction_list, has_more = paginate_by_text_score(transactions, query, limit, skip=skip)
+                next_cursor = None
+            else:
+                transaction_list, next_cursor = paginate(transactions, query, sort_by, sort_order, limit,
+                                                         after=after, skip=skip)
+                has_more = next_cursor is not None
+            count_info = count_cache.count(transactions, user_id, query, request.args.get('count'))
+        except (InvalidCursorError, ValueError) as e:
+            return jsonify({"success": False, "message": str(e)}), 400
+        total_items = count_info['totalItems']
 
         # Serialize
         serialized_transactions = [serialize_transaction(tx) for tx in transaction_list]
@@ -368,8 +552,9 @@ def get_transactions():
             'maxAmount': request.args.get('maxAmount'),
             'paymentMethod': request.args.get('paymentMethod'),
             'tags': request.args.get('tags'),
-            'search': request.args.get('search'),
-            'sortBy': sort_by,
+            'search': search or None,
+            'searchMode': search_mode,
+            'sortBy': 'relevance' if ranked else sort_by,
             'sortOrder': request.args.get('sortOrder', 'desc')
         }
 
@@ -379,6 +564,11 @@ def get_transactions():
             "limit": limit,
             "totalPages": (total_items + limit - 1) // limit,
             "totalItems": total_items,
+            "totalIsExact": count_info['totalIsExact'],
+            "totalLabel": count_info['totalLabel'],
+            "countStrategy": count_info['countStrategy'],
+            "nextCursor": next_cursor,
+            "hasMore": has_more,
             "filters": {
                 "type": options.get("type"),
                 "category": options.get("category"),
@@ -389,6 +579,7 @@ def get_transactions():
                 "paymentMethod": options.get("paymentMethod"),
                 "tags": options.get("tags"),
                 "search": options.get("search"),
+                "searchMode": options.get("searchMode"),
                 "sortBy": options.get("sortBy"),
                 "sortOrder": options.get("sortOrder")
             }
@@ -436,9 +627,13 @@ def create_transaction():
             "paymentMethod": data.get('paymentMethod', ''),
             "tags": data.get('tags', [])
         }
+        if data.get('merchant'):
+            transaction['merchant'] = data['merchant']
+        transaction['searchTokens'] = search_tokens(transaction)
 
         # Insert into DB
         result = transactions.insert_one(transaction)
+        count_cache.invalidate(user_id)
         new_transaction = transactions.find_one({"_id": result.inserted_id})
 
         return jsonify({
@@ -460,21 +655,41 @@ def create_transaction():
 
 # PUT /api/transactions/<id>
 @app.route('/api/transactions/<string:id>', methods=['PUT'])
-def update_transaction(user_id, id):
+def update_transaction(id):
     try:
-        existing = Transaction.find_by_id_and_user(id, user_id.id)
-        if not existing:
+        user_id = request.headers.get('user_id', '1')  # Default user_id for testing
+        if not ObjectId.is_valid(id):
             return jsonify({'success': False, 'message': 'Transaction not found'}), 404
 
-        data = request.get_json()
-        if 'category' in data and not Category.is_valid_for_user(data['category'], user_id.id):
-            return jsonify({'success': False, 'message': 'Invalid category'}), 403
+        data = request.get_json() or {}
+        update_fields = {
+            key: data[key]
+            for key in ('type', 'amount', 'category', 'date', 'description', 'merchant', 'paymentMethod', 'tags')
+            if key in data
+        }
+        if 'amount' in update_fields:
+            update_fields['amount'] = float(update_fields['amount'])
+        if 'date' in update_fields:
+            update_fields['date'] = datetime.fromisoformat(update_fields['date'])
+
+        updated = transactions.find_one_and_update(
+            {'_id': ObjectId(id), 'user_id': user_id},
+            {'$set': update_fields},
+            return_document=ReturnDocument.AFTER
+        ) if update_fields else transactions.find_one({'_id': ObjectId(id), 'user_id': user_id})
+        if not updated:
+            return jsonify({'success': False, 'message': 'Transaction not found'}), 404
 
-        updated = Transaction.update(id, data)
+        # Keep the search index in step with the searchable fields
+        if touches_search_fields(update_fields):
+            updated['searchTokens'] = search_tokens(updated)
+            transactions.update_one({'_id': updated['_id']}, {'$set': {'searchTokens': updated['searchTokens']}})
+
+        count_cache.invalidate(user_id)
         return jsonify({
             'success': True,
             'message': 'Transaction updated successfully',
-            'data': {'transaction': updated}
+            'data': {'transaction': serialize_transaction(updated)}
         })
 
     except Exception as e:
@@ -484,23 +699,33 @@ def update_transaction(user_id, id):
 
 # DELETE /api/transactions/<id>
 @app.route('/api/transactions/<string:id>', methods=['DELETE'])
-def delete_transaction(user_id, id):
-    deleted = Transaction.delete_by_id_and_user(id, user_id.id)
-    if not deleted:
+def delete_transaction(id):
+    user_id = request.headers.get('user_id', '1')  # Default user_id for testing
+    if not ObjectId.is_valid(id):
         return jsonify({'success': False, 'message': 'Transaction not found'}), 404
+
+    result = transactions.delete_one({'_id': ObjectId(id), 'user_id': user_id})
+    if result.deleted_count == 0:
+        return jsonify({'success': False, 'message': 'Transaction not found'}), 404
+
+    count_cache.invalidate(user_id)
     return jsonify({'success': True, 'message': 'Transaction deleted successfully'})
 
 
 # DELETE /api/transactions/bulk
 @app.route('/api/transactions/bulk', methods=['DELETE'])
-def bulk_delete_transactions(user_id):
-    data = request.get_json()
+def bulk_delete_transactions():
+    user_id = request.headers.get('user_id', '1')  # Default user_id for testing
+    data = request.get_json() or {}
     transaction_ids = data.get('transactionIds', [])
 
     if not transaction_ids or not isinstance(transaction_ids, list):
         return jsonify({'success': False, 'message': 'Invalid transaction ID list'}), 400
 
-    count = Transaction.bulk_delete(transaction_ids, user_id.id)
+    object_ids = [ObjectId(transaction_id) for transaction_id in transaction_ids if ObjectId.is_valid(transaction_id)]
+    count = transactions.delete_many({'_id': {'$in': object_ids}, 'user_id': user_id}).deleted_count if object_ids else 0
+    if count:
+        count_cache.invalidate(user_id)
     return jsonify({
         'success': True,
         'message': f'{count} transactions deleted successfully',
@@ -510,13 +735,17 @@ def bulk_delete_transactions(user_id):
 
 # GET /api/transactions/stats
 @app.route('/api/transactions/stats', methods=['GET'])
-def get_transaction_stats(user_id):
+def get_transaction_stats():
+    user_id = request.headers.get('user_id', '1')  # Default user_id for testing
     try:
-        stats = Transaction.get_stats(user_id.id, {
-            'startDate': request.args.get('startDate'),
-            'endDate': request.args.get('endDate'),
-            'period': request.args.get('period', 'month')
-        })
+        try:
+            start_date = datetime.fromisoformat(request.args['startDate']) if request.args.get('startDate') else None
+            end_date = datetime.fromisoformat(request.args['endDate']) if request.args.get('endDate') else None
+            # One aggregation round trip regardless of how many transactions the user has
+            stats = aggregate_transaction_stats(transactions, user_id, start_date, end_date,
+                                                request.args.get('period', 'month'))
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
         return jsonify({
             'success': True,
             'message': 'Transaction statistics retrieved successfully',
@@ -567,9 +796,22 @@ def health_check():
         'success': True,
         'message': 'OCR service is running',
         'service': 'Flask OCR Service',
-        'version': '1.0.0'
+        'version': '1.0.0',
+        'ocrPool': ocr_pool.stats(),
+        'ocrCache': ocr_cache.stats(),
+        'ocrJobs': ocr_jobs.stats()
     })
 
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus metrics for this server process"""
+    if not METRICS_ENABLED:
+        return jsonify({
+            'success': False,
+            'message': 'Metrics are disabled'
+        }), 404
+    return metrics_response(metrics)
+
 @app.route('/process-receipt', methods=['POST'])
 def process_receipt():
     """
@@ -599,15 +841,45 @@ def process_receipt():
                 'message': 'Invalid file type. Allowed types: PNG, JPG, JPEG, PDF'
             }), 400
         
-        # Create temporary file
-        with tempfile.NamedTemporaryFile(delete=False, 
-                                       suffix=os.path.splitext(file.filename)[1]) as temp_file:
-            file.save(temp_file.name)
-            temp_filepath = temp_file.name
+        # Optional per-request preprocessing stages, timing breakdown and structure
+        try:
+            options = parse_ocr_options()
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        
+        file_bytes = file.read()
+        file_extension = os.path.splitext(file.filename)[1].lower()
+        
+        if len(file_bytes) > app.config['MAX_FILE_SIZE']:
+            return jsonify({
+                'success': False,
+                'message': file_too_large_message()
+            }), 413
+        
+        # Serve repeated uploads of the same receipt from the cache
+        cache_key = None
+        if ocr_cache.enabled and not options['debug']:
+            cache_key = receipt_cache_key(file_bytes, file_extension, options)
+            cached_result = ocr_cache.get(cache_key)
+            if cached_result is not None:
+                logger.info(f"Served cached receipt result: {file.filename}")
+                return jsonify({
+                    'success': True,
+                    'message': 'Receipt processed successfully',
+                    'data': cached_result,
+                    'cached': True
+                })
         
         try:
-            # Process the file
-            result = ocr_processor.process_receipt(temp_filepath)
+            # Process the upload in memory in the OCR worker pool
+            result = finish_ocr_result(
+                ocr_pool.run('process_receipt', file_bytes, file_extension, **ocr_call_options(options)), options)
+            
+            if cache_key:
+                ocr_cache.set(cache_key, result)
             
             logger.info(f"Successfully processed receipt: {file.filename}")
             
@@ -617,17 +889,293 @@ def process_receipt():
                 'data': result
             })
             
+        except OCRPoolBusyError as e:
+            logger.warning(f"Rejected receipt {file.filename}: {str(e)}")
+            response = jsonify({
+                'success': False,
+                'message': str(e)
+            })
+            response.headers['Retry-After'] = '1'
+            return response, 503
+            
+        except OCRPoolTimeoutError as e:
+            logger.error(f"Timed out processing receipt {file.filename}")
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 504
+            
         except Exception as e:
             logger.error(f"Error processing receipt {file.filename}: {str(e)}")
             return jsonify({
                 'success': False,
                 'message': f'Error processing receipt: {str(e)}'
             }), 500
+    
+    except Exception as e:
+        logger.error(f"Unexpected error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': 'An unexpected error occurred'
+        }), 500
+
+def iter_batch_results(entries, options):
+    """
+    Process batch entries concurrently, yielding results as they complete
+    
+    Args:
+        entries (list): Dicts with index, filename, bytes, extension and an
+            'error' message for files rejected up front
+        options (dict): process_receipt keyword arguments from parse_ocr_options
+    
+    Yields:
+        dict: Per-file result with index and filename
+    """
+    concurrency = max(ocr_pool.size, 1)
+    pending = {}
+    queue = []
+    
+    for entry in entries:
+        if entry.get('error'):
+            yield {'index': entry['index'], 'filename': entry['filename'],
+                   'success': False, 'message': entry['error']}
+            continue
+        
+        # Duplicate receipts are answered from the cache without OCR
+        entry['cacheKey'] = None
+        if ocr_cache.enabled and not options['debug']:
+            entry['cacheKey'] = receipt_cache_key(entry['bytes'], entry['extension'], options)
+            cached_result = ocr_cache.get(entry['cacheKey'])
+            if cached_result is not None:
+                yield {'index': entry['index'], 'filename': entry['filename'],
+                       'success': True, 'data': cached_result, 'cached': True}
+                continue
+        queue.append(entry)
+    
+    queue.reverse()
+    while queue or pending:
+        # Keep at most one job per OCR worker in flight for this batch
+        while queue and len(pending) < concurrency:
+            entry = queue.pop()
+            try:
+                future = ocr_pool.submit('process_receipt', entry['bytes'], entry['extension'],
+                                         **ocr_call_options(options))
+            except OCRPoolBusyError as e:
+                yield {'index': entry['index'], 'filename': entry['filename'],
+                       'success': False, 'message': str(e)}
+                continue
+            pending[future] = entry
+        
+        if not pending:
+            continue
+        
+        done, _ = wait(pending, timeout=ocr_pool.timeout, return_when=FIRST_COMPLETED)
+        if not done:
+            # Nothing finished within the timeout: give up on the remaining files
+            for future, entry in list(pending.items()) + [(None, entry) for entry in queue]:
+                if future is not None:
+                    future.cancel()
+                yield {'index': entry['index'], 'filename': entry['filename'],
+                       'success': False, 'message': 'OCR processing timed out'}
+            return
+        
+        for future in done:
+            entry = pending.pop(future)
+            try:
+                result = finish_ocr_result(future.result(), options)
+            except Exception as e:
+                logger.error(f"Error processing receipt {entry['filename']}: {str(e)}")
+                yield {'index': entry['index'], 'filename': entry['filename'],
+                       'success': False, 'message': f'Error processing receipt: {str(e)}'}
+                continue
             
-        finally:
-            # Clean up temporary file
-            if os.path.exists(temp_filepath):
-                os.unlink(temp_filepath)
+            if entry['cacheKey']:
+                ocr_cache.set(entry['cacheKey'], result)
+            yield {'index': entry['index'], 'filename': entry['filename'],
+                   'success': True, 'data': result}
+
+@app.route('/process-receipts', methods=['POST'])
+def process_receipts():
+    """
+    Process a batch of uploaded receipts concurrently
+    
+    Files are sent as multipart 'files' fields. Results come back in upload
+    order, or as NDJSON lines in completion order with ?stream=true.
+    """
+    try:
+        files = [file for file in request.files.getlist('files') if file.filename]
+        if not files:
+            return jsonify({
+                'success': False,
+                'message': 'No files provided'
+            }), 400
+        
+        if len(files) > app.config['BATCH_MAX_FILES']:
+            return jsonify({
+                'success': False,
+                'message': f"Too many files. Maximum batch size is {app.config['BATCH_MAX_FILES']}."
+            }), 400
+        
+        try:
+            options = parse_ocr_options()
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        
+        # Read and validate every file up front; invalid files fail individually
+        entries = []
+        total_bytes = 0
+        for index, file in enumerate(files):
+            entry = {'index': index, 'filename': file.filename}
+            if not allowed_file(file.filename):
+                entry['error'] = 'Invalid file type. Allowed types: PNG, JPG, JPEG, PDF'
+            else:
+                entry['bytes'] = file.read()
+                entry['extension'] = os.path.splitext(file.filename)[1].lower()
+                total_bytes += len(entry['bytes'])
+                if len(entry['bytes']) > app.config['MAX_FILE_SIZE']:
+                    entry['error'] = file_too_large_message()
+            entries.append(entry)
+        
+        if total_bytes > app.config['BATCH_MAX_BYTES']:
+            return jsonify({
+                'success': False,
+                'message': f"Batch too large. Maximum total size is "
+                           f"{app.config['BATCH_MAX_BYTES'] / (1024 * 1024):.0f}MB."
+            }), 413
+        
+        logger.info(f"Processing batch of {len(entries)} receipts")
+        
+        if request.args.get('stream', '').lower() == 'true':
+            def generate():
+                for result in iter_batch_results(entries, options):
+                    yield json.dumps(result) + '\n'
+            return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+        
+        results = sorted(iter_batch_results(entries, options), key=lambda result: result['index'])
+        failed = sum(1 for result in results if not result['success'])
+        
+        return jsonify({
+            'success': True,
+            'message': f'Processed {len(results) - failed} of {len(results)} receipts',
+            'data': {
+                'results': results,
+                'processed': len(results) - failed,
+                'failed': failed
+            }
+        })
+    
+    except Exception as e:
+        logger.error(f"Unexpected error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': 'An unexpected error occurred'
+        }), 500
+
+def run_receipt_job(file_bytes, file_extension, options, cache_key):
+    """
+    Run one receipt through the OCR pool from a background job thread
+    
+    Unlike request handlers, jobs wait for a free pool slot instead of
+    failing when the pool is busy. Waiting for the slot counts towards
+    JOBS_TIMEOUT.
+    
+    Raises:
+        OCRPoolTimeoutError: If no slot frees up or OCR does not finish in time
+    """
+    deadline = time.monotonic() + app.config['JOBS_TIMEOUT']
+    try:
+        future = ocr_pool.submit('process_receipt', file_bytes, file_extension,
+                                 admission_timeout=app.config['JOBS_TIMEOUT'], **ocr_call_options(options))
+    except OCRPoolBusyError:
+        raise OCRPoolTimeoutError('OCR processing timed out waiting for a free worker')
+    
+    try:
+        result = finish_ocr_result(future.result(timeout=max(deadline - time.monotonic(), 0)), options)
+    except FutureTimeoutError:
+        future.cancel()
+        raise OCRPoolTimeoutError('OCR processing timed out')
+    
+    if cache_key:
+        ocr_cache.set(cache_key, result)
+    return result
+
+@app.route('/jobs/process-receipt', methods=['POST'])
+def submit_receipt_job():
+    """
+    Queue an uploaded receipt for background processing and return a job ID
+    """
+    try:
+        if 'file' not in request.files or request.files['file'].filename == '':
+            return jsonify({
+                'success': False,
+                'message': 'No file provided'
+            }), 400
+        
+        file = request.files['file']
+        
+        if not allowed_file(file.filename):
+            return jsonify({
+                'success': False,
+                'message': 'Invalid file type. Allowed types: PNG, JPG, JPEG, PDF'
+            }), 400
+        
+        try:
+            # Jobs never include debug timings
+            options = dict(parse_ocr_options(), debug=False)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        
+        file_bytes = file.read()
+        file_extension = os.path.splitext(file.filename)[1].lower()
+        
+        if len(file_bytes) > app.config['MAX_FILE_SIZE']:
+            return jsonify({
+                'success': False,
+                'message': file_too_large_message()
+            }), 413
+        
+        metadata = {'filename': file.filename}
+        cache_key = None
+        if ocr_cache.enabled:
+            cache_key = receipt_cache_key(file_bytes, file_extension, options)
+            cached_result = ocr_cache.get(cache_key)
+            if cached_result is not None:
+                job_id = ocr_jobs.complete(cached_result, {**metadata, 'cached': True})
+                return jsonify({
+                    'success': True,
+                    'message': 'Receipt processed successfully',
+                    'data': ocr_jobs.get(job_id)
+                }), 200
+        
+        try:
+            job_id = ocr_jobs.submit(
+                lambda: run_receipt_job(file_bytes, file_extension, options, cache_key), metadata
+            )
+        except OCRJobQueueFullError as e:
+            response = jsonify({
+                'success': False,
+                'message': str(e)
+            })
+            response.headers['Retry-After'] = '5'
+            return response, 503
+        
+        logger.info(f"Queued receipt {file.filename} as job {job_id}")
+        
+        return jsonify({
+            'success': True,
+            'message': 'Receipt queued for processing',
+            'data': {
+                'jobId': job_id,
+                'status': 'queued',
+                'statusUrl': f'/jobs/{job_id}'
+            }
+        }), 202
     
     except Exception as e:
         logger.error(f"Unexpected error: {str(e)}")
@@ -636,6 +1184,34 @@ def process_receipt():
             'message': 'An unexpected error occurred'
         }), 500
 
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_receipt_job(job_id):
+    """
+    Get the status and result of a receipt job
+    
+    Pass ?wait=<seconds> to long-poll until the job finishes.
+    """
+    try:
+        wait_seconds = min(max(float(request.args.get('wait', 0)), 0), app.config['JOBS_MAX_WAIT'])
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'message': 'wait must be a number of seconds'
+        }), 400
+    
+    job = ocr_jobs.get(job_id, wait=wait_seconds)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'message': 'Job not found or expired'
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'message': f"Job {job['status']}",
+        'data': job
+    }), 200
+
 @app.route('/process-text', methods=['POST'])
 def process_text():
     """
@@ -658,8 +1234,17 @@ def process_text():
                 'message': 'Text content cannot be empty'
             }), 400
         
+        # Optional hint for reading ambiguous numeric dates
+        try:
+            date_order = parse_date_order(data)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        
         # Extract information from text
-        result = ocr_processor.extract_from_text(text)
+        result = ocr_processor.extract_from_text(text, date_order=date_order)
         
         return jsonify({
             'success': True,
@@ -676,6 +1261,72 @@ def process_text():
 
 
 
+@app.route('/process-texts', methods=['POST'])
+def process_texts():
+    """
+    Extract financial information from many texts, e.g. statement lines
+    
+    Accepts either a list of texts or one text split into lines. Blank rows
+    are skipped; every result carries the index of its row in the input.
+    """
+    try:
+        data = request.get_json()
+        
+        if not data or ('texts' not in data and 'text' not in data):
+            return jsonify({
+                'success': False,
+                'message': 'A texts list or a text is required'
+            }), 400
+        
+        if 'texts' in data:
+            texts = data['texts']
+            if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+                return jsonify({
+                    'success': False,
+                    'message': 'texts must be a list of strings'
+                }), 400
+        else:
+            if not isinstance(data['text'], str):
+                return jsonify({
+                    'success': False,
+                    'message': 'text must be a string'
+                }), 400
+            texts = data['text'].splitlines()
+        
+        max_rows = app.config['TEXT_BATCH_MAX_ROWS']
+        if len(texts) > max_rows:
+            return jsonify({
+                'success': False,
+                'message': f'Too many rows. Maximum is {max_rows} per request.'
+            }), 413
+        
+        try:
+            date_order = parse_date_order(data)
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+        
+        indexes = [index for index, text in enumerate(texts) if text.strip()]
+        results = ocr_processor.extract_from_texts([texts[index] for index in indexes], date_order=date_order)
+        
+        return jsonify({
+            'success': True,
+            'message': f'Processed {len(results)} row(s)',
+            'data': {
+                'count': len(results),
+                'results': [{'index': index, **result} for index, result in zip(indexes, results)]
+            }
+        })
+        
+    except Exception as e:
+        logger.error(f"Error processing texts: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': f'Error processing texts: {str(e)}'
+        }), 500
+
 @app.route('/supported-formats', methods=['GET'])
 def get_supported_formats():
     """
@@ -685,15 +1336,20 @@ def get_supported_formats():
         'success': True,
         'data': {
             'supportedFormats': list(ALLOWED_EXTENSIONS),
-            'maxFileSize': app.config['MAX_CONTENT_LENGTH'],
-            'maxFileSizeMB': app.config['MAX_CONTENT_LENGTH'] / (1024 * 1024),
+            'maxFileSize': app.config['MAX_FILE_SIZE'],
+            'maxFileSizeMB': app.config['MAX_FILE_SIZE'] / (1024 * 1024),
+            'maxBatchFiles': app.config['BATCH_MAX_FILES'],
+            'maxBatchSize': app.config['BATCH_MAX_BYTES'],
+            'maxTextBatchRows': app.config['TEXT_BATCH_MAX_ROWS'],
             'features': [
                 'Text extraction from images (PNG, JPG, JPEG)',
                 'PDF text extraction',
                 'Amount detection',
                 'Date recognition',
                 'Merchant name identification',
-                'Receipt structure analysis'
+                'Receipt structure analysis',
+                'Batch receipt processing',
+                'Bulk statement text extraction'
             ]
         }
     })
@@ -727,7 +1383,10 @@ if __name__ == '__main__':
     logger.info(f"Starting Flask OCR Service on port {port}")
     logger.info(f"Debug mode: {debug}")
     logger.info(f"Upload folder: {app.config['UPLOAD_FOLDER']}")
-    logger.info(f"Max file size: {app.config['MAX_CONTENT_LENGTH'] / (1024 * 1024):.1f}MB")
+    logger.info(f"Max file size: {app.config['MAX_FILE_SIZE'] / (1024 * 1024):.1f}MB")
+    
+    if ENSURE_INDEXES:
+        ensure_indexes_at_startup(mongo_uri, db.name)
     
     app.run(
         host='0.0.0.0',
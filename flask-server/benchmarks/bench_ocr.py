@@ -0,0 +1,211 @@
+"""
+OCR Benchmark
+Runs OCRProcessor.process_receipt over a synthetic receipt corpus and reports
+per-stage latency percentiles, throughput at several worker pool sizes, peak
+RSS and field accuracy as JSON. With --baseline, compares against an earlier
+report and exits non-zero on regressions so it can gate performance changes.
+
+Usage:
+    python benchmarks/bench_ocr.py [--count 20] [--concurrency 1,2,4] [--output results.json]
+    python benchmarks/bench_ocr.py --baseline results.json --max-regression 0.1
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import platform
+from concurrent.futures import wait
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fixtures import build_corpus, field_accuracy
+from ocr_pool import OCRWorkerPool
+from ocr_service import OCRProcessor
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def _percentile(values, percent):
+    """Linearly interpolated percentile of a non-empty list"""
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * percent / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def _summary(values):
+    """Mean, max and percentiles of millisecond timings"""
+    return {
+        'mean': round(sum(values) / len(values), 2),
+        **{f'p{percent}': round(_percentile(values, percent), 2) for percent in PERCENTILES},
+        'max': round(max(values), 2),
+    }
+
+
+def _peak_rss_mb(who):
+    """Peak resident set size in MB (ru_maxrss is KB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(who).ru_maxrss
+    return round(peak / (1024 * 1024 if platform.system() == 'Darwin' else 1024), 1)
+
+
+def _process_peak_rss_mb(pid):
+    """Peak resident set size of a live process in MB (VmHWM), None where /proc is unavailable"""
+    try:
+        with open(f'/proc/{pid}/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def run_latency(processor, corpus, structured):
+    """OCR each receipt in-process, one at a time, collecting stage timings"""
+    results, totals, stages, tiers = [], [], {}, {}
+    for data, file_type, _ in corpus:
+        start = time.perf_counter()
+        result = processor.process_receipt(data, file_type, debug=True, structured=structured)
+        totals.append((time.perf_counter() - start) * 1000)
+
+        # Stage time across every tier tried for this receipt
+        receipt_stages = {}
+        for attempt in result['debug']['tiers']:
+            for name, ms in attempt['timingsMs'].items():
+                receipt_stages[name] = receipt_stages.get(name, 0.0) + ms
+        for name, ms in receipt_stages.items():
+            stages.setdefault(name, []).append(ms)
+
+        tiers[result['ocrTier']] = tiers.get(result['ocrTier'], 0) + 1
+        results.append(result)
+
+    return results, {
+        'receiptMs': _summary(totals),
+        'stageMs': {name: _summary(values) for name, values in sorted(stages.items())},
+        'ocrTiers': tiers,
+    }
+
+
+def run_throughput(corpus, workers, structured):
+    """Receipts per second through a worker pool of the given size"""
+    pool = OCRWorkerPool(size=workers, queue_size=len(corpus) + workers)
+    try:
+        # Start the workers and load Tesseract before timing
+        warm_up = [pool.submit('warm_up') for _ in range(max(workers, 1))]
+        wait(warm_up)
+
+        start = time.perf_counter()
+        futures = [pool.submit('process_receipt', data, file_type, structured=structured)
+                   for data, file_type, _ in corpus]
+        for future in futures:
+            future.result(timeout=pool.timeout)
+        elapsed = time.perf_counter() - start
+
+        # Sampled while the workers are still alive
+        worker_peaks = [_process_peak_rss_mb(pid) for pid in pool.worker_pids()]
+    finally:
+        pool.shutdown()
+
+    worker_peaks = [peak for peak in worker_peaks if peak is not None]
+    return {
+        'workers': workers,
+        'seconds': round(elapsed, 3),
+        'receiptsPerSecond': round(len(corpus) / elapsed, 2),
+        'workerPeakRssMb': {
+            'perWorker': worker_peaks,
+            'total': round(sum(worker_peaks), 1),
+        } if worker_peaks else None,
+    }
+
+
+def find_regressions(report, baseline, max_regression):
+    """
+    Compare a report against a baseline report
+
+    Args:
+        report (dict): Current report
+        baseline (dict): Earlier report from this script
+        max_regression (float): Allowed relative slowdown, e.g. 0.1 for 10%
+
+    Returns:
+        list: Human readable regressions, empty if none
+    """
+    regressions = []
+
+    for percent in ('p50', 'p95'):
+        before, after = baseline['latency']['receiptMs'][percent], report['latency']['receiptMs'][percent]
+        if before and after > before * (1 + max_regression):
+            regressions.append(f"receipt latency {percent} {before}ms -> {after}ms")
+
+    previous = {str(entry['workers']): entry for entry in baseline.get('throughput', [])}
+    for entry in report['throughput']:
+        before = previous.get(str(entry['workers']))
+        if before and entry['receiptsPerSecond'] < before['receiptsPerSecond'] * (1 - max_regression):
+            regressions.append(f"throughput at {entry['workers']} workers "
+                               f"{before['receiptsPerSecond']}/s -> {entry['receiptsPerSecond']}/s")
+
+    # Accuracy must not drop at all
+    for field, before in baseline['accuracy'].items():
+        after = report['accuracy'].get(field, 0.0)
+        if after < before:
+            regressions.append(f"{field} accuracy {before} -> {after}")
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=20, help='Number of synthetic receipts')
+    parser.add_argument('--seed', type=int, default=0, help='Corpus seed')
+    parser.add_argument('--scans', action='store_true', help='Render flat scans instead of phone photos')
+    parser.add_argument('--structured', action='store_true', help='Also read totals from the word layout')
+    parser.add_argument('--concurrency', default='1,2,4', help='Comma separated worker pool sizes to measure')
+    parser.add_argument('--baseline', help='Earlier JSON report to compare against')
+    parser.add_argument('--max-regression', type=float, default=0.1,
+                        help='Allowed relative latency/throughput regression against the baseline')
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.count, seed=args.seed, photo=not args.scans)
+    processor = OCRProcessor()
+    processor.warm_up()
+
+    results, latency = run_latency(processor, corpus, args.structured)
+    report = {
+        'count': args.count,
+        'seed': args.seed,
+        'photo': not args.scans,
+        'structured': args.structured,
+        'config': json.loads(processor.config_fingerprint()),
+        'latency': latency,
+        'accuracy': field_accuracy(results, [truth for _, _, truth in corpus]),
+        'throughput': [run_throughput(corpus, int(level), args.structured)
+                       for level in args.concurrency.split(',') if level.strip()],
+        # Pool totals are per throughput level; the single largest exited
+        # child (a pool worker or a Tesseract CLI run) is only an upper bound per process
+        'peakRssMb': {
+            'main': _peak_rss_mb(resource.RUSAGE_SELF),
+            'largestChild': _peak_rss_mb(resource.RUSAGE_CHILDREN),
+        },
+    }
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            report['regressions'] = find_regressions(report, json.load(baseline_file), args.max_regression)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as report_file:
+            report_file.write(output)
+    print(output)
+
+    if report.get('regressions'):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Preprocessing Benchmark
+Compares preprocessing pipelines, by default full-frame thresholding
+against adaptive crop + rescale
+
+Usage:
+    python benchmarks/bench_preprocess.py [--count 10] [--ocr] [--output results.json]
+    python benchmarks/bench_preprocess.py --pipeline denoise,threshold --pipeline deskew,crop,resize,threshold
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+from fixtures import build_corpus, field_accuracy
+from ocr_service import OCRProcessor
+from preprocessing import DEFAULT_STAGES, PreprocessingPipeline, StageTimings
+
+# Full-frame pipeline used before adaptive cropping and rescaling
+FULL_FRAME_STAGES = 'denoise,threshold'
+
+
+def run_pipeline(processor, pipeline, corpus, run_ocr):
+    """Time preprocessing (and optionally full OCR) over the corpus"""
+    images = [cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR) for data, _, _ in corpus]
+
+    timings = []
+    stage_timings = StageTimings()
+    for image in images:
+        start = time.perf_counter()
+        processed = processor._preprocess_image(image, pipeline, stage_timings)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    report = {
+        'preprocessMsMean': round(statistics.mean(timings), 2),
+        'preprocessMsMedian': round(statistics.median(timings), 2),
+        'stageMsMean': {name: round(total / len(images), 2) for name, total in stage_timings.as_dict().items()},
+        'outputPixels': int(processed.shape[0] * processed.shape[1]),
+    }
+
+    if run_ocr:
+        results, ocr_timings = [], []
+        for data, file_type, _ in corpus:
+            start = time.perf_counter()
+            results.append(processor.process_receipt(data, file_type, preprocess_stages=pipeline.spec))
+            ocr_timings.append((time.perf_counter() - start) * 1000)
+        report['receiptMsMean'] = round(statistics.mean(ocr_timings), 2)
+        report['accuracy'] = field_accuracy(results, [truth for _, _, truth in corpus])
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=10, help='Number of synthetic receipts')
+    parser.add_argument('--seed', type=int, default=0, help='Corpus seed')
+    parser.add_argument('--ocr', action='store_true', help='Also run Tesseract and report field accuracy')
+    parser.add_argument('--pipeline', action='append', dest='pipelines',
+                        help='Comma separated stages to benchmark; repeat to compare (first is the baseline)')
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.count, seed=args.seed)
+    processor = OCRProcessor()
+
+    pipelines = [PreprocessingPipeline.parse(spec) for spec in (args.pipelines or [FULL_FRAME_STAGES, DEFAULT_STAGES])]
+
+    report = {'count': args.count, 'pipelines': {}}
+    for pipeline in pipelines:
+        report['pipelines'][pipeline.spec] = run_pipeline(processor, pipeline, corpus, args.ocr)
+
+    # Speedup of every pipeline relative to the first one
+    baseline = report['pipelines'][pipelines[0].spec]['preprocessMsMean']
+    for result in report['pipelines'].values():
+        result['speedup'] = round(baseline / result['preprocessMsMean'], 2) if result['preprocessMsMean'] else None
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as report_file:
+            report_file.write(output)
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Text Extraction Benchmark
+Measures /process-text throughput on long statement texts with the
+single-pass amount scan against one finditer pass per currency pattern,
+and /process-texts on the same statement split into lines
+
+Usage:
+    python benchmarks/bench_text.py [--lines 2000] [--requests 20] [--output results.json]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fixtures import build_statement_text
+import app as server
+
+MODES = {'per-pattern': False, 'single-pass': True}
+
+
+def run_mode(client, text, single_pass, requests):
+    """Time repeated /process-text requests with one extraction mode"""
+    server.ocr_processor.single_pass_extraction = single_pass
+
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = client.post('/process-text', json={'text': text})
+        timings.append((time.perf_counter() - start) * 1000)
+        if response.status_code != 200:
+            raise RuntimeError(f"/process-text returned {response.status_code}: {response.get_data(as_text=True)}")
+
+    data = response.get_json()['data']
+    return {
+        'requestMsMean': round(statistics.mean(timings), 2),
+        'requestMsMedian': round(statistics.median(timings), 2),
+        'requestsPerSecond': round(1000 / statistics.mean(timings), 2),
+        'extractedAmount': data['extractedAmount'],
+        'extractedDate': data['extractedDate'],
+    }
+
+
+def run_bulk(client, text, requests):
+    """Time /process-texts with one row per statement line"""
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = client.post('/process-texts', json={'text': text})
+        timings.append((time.perf_counter() - start) * 1000)
+        if response.status_code != 200:
+            raise RuntimeError(f"/process-texts returned {response.status_code}: {response.get_data(as_text=True)}")
+
+    rows = response.get_json()['data']['count']
+    return {
+        'rows': rows,
+        'requestMsMean': round(statistics.mean(timings), 2),
+        'requestMsMedian': round(statistics.median(timings), 2),
+        'rowsPerSecond': round(rows * 1000 / statistics.mean(timings), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lines', type=int, default=2000, help='Transaction lines in the statement text')
+    parser.add_argument('--requests', type=int, default=20, help='Requests per mode')
+    parser.add_argument('--seed', type=int, default=0, help='Text seed')
+    parser.add_argument('--output', help='Write the JSON report to this file')
+    args = parser.parse_args()
+
+    text = build_statement_text(args.lines, seed=args.seed)
+    client = server.app.test_client()
+    original_mode = server.ocr_processor.single_pass_extraction
+
+    report = {'lines': args.lines, 'textBytes': len(text.encode('utf-8')), 'requests': args.requests, 'modes': {}}
+    try:
+        for name, single_pass in MODES.items():
+            report['modes'][name] = run_mode(client, text, single_pass, args.requests)
+        report['bulk'] = run_bulk(client, text, args.requests)
+    finally:
+        server.ocr_processor.single_pass_extraction = original_mode
+
+    # Both modes must agree; only the speed should differ
+    baseline, optimized = report['modes']['per-pattern'], report['modes']['single-pass']
+    report['resultsMatch'] = all(baseline[field] == optimized[field] for field in ('extractedAmount', 'extractedDate'))
+    report['speedup'] = round(baseline['requestMsMean'] / optimized['requestMsMean'], 2) if optimized['requestMsMean'] else None
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as report_file:
+            report_file.write(output)
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
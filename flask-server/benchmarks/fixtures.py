@@ -0,0 +1,183 @@
+"""
+Synthetic Receipt Fixtures
+Renders receipts with PIL so benchmarks run offline with known ground truth
+"""
+
+import io
+import random
+from datetime import date, timedelta
+from typing import Dict, List, Tuple
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+MERCHANTS = [
+    'GREEN VALLEY MARKET', 'SUNRISE CAFE', 'CITY PHARMACY', 'MAPLE HARDWARE STORE',
+    'BLUE OCEAN RESTAURANT', 'CORNER MART', 'HILLSIDE GAS STATION', 'RIVERSIDE BAKERY'
+]
+
+ITEMS = [
+    'MILK 1L', 'BREAD', 'EGGS DOZEN', 'COFFEE', 'APPLES', 'RICE 5KG', 'SOAP',
+    'PASTA', 'CHEESE', 'ORANGE JUICE', 'BATTERIES', 'NOTEBOOK', 'TEA', 'BUTTER'
+]
+
+
+def _load_font(size: int) -> ImageFont.ImageFont:
+    """Load a scalable font, falling back to PIL's built-in bitmap font"""
+    for name in ('DejaVuSansMono.ttf', 'DejaVuSans.ttf', 'Arial.ttf'):
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    return ImageFont.load_default()
+
+
+def _receipt_lines(rng: random.Random) -> Tuple[List[str], Dict]:
+    """Build receipt text lines and the expected extraction result"""
+    merchant = rng.choice(MERCHANTS)
+    purchase_date = date(2024, 1, 1) + timedelta(days=rng.randrange(365))
+
+    lines = [merchant, f"{rng.randint(10, 999)} MAIN STREET", f"DATE: {purchase_date.strftime('%m/%d/%Y')}", '']
+    subtotal = 0.0
+    for item in rng.sample(ITEMS, rng.randint(3, 8)):
+        price = round(rng.uniform(0.99, 49.99), 2)
+        subtotal += price
+        lines.append(f"{item:<20}{price:>8.2f}")
+
+    subtotal = round(subtotal, 2)
+    tax = round(subtotal * 0.08, 2)
+    total = round(subtotal + tax, 2)
+    lines += ['', f"{'SUBTOTAL':<20}{subtotal:>8.2f}", f"{'TAX':<20}{tax:>8.2f}",
+              f"TOTAL: ${total:.2f}", '', 'THANK YOU']
+
+    truth = {
+        'extractedAmount': total,
+        'extractedDate': purchase_date.isoformat(),
+        'extractedMerchant': merchant
+    }
+    return lines, truth
+
+
+def render_receipt(seed: int, photo: bool = True, canvas_size: Tuple[int, int] = (3000, 4000)) -> Tuple[Image.Image, Dict]:
+    """
+    Render one synthetic receipt
+
+    Args:
+        seed (int): Seed making the receipt reproducible
+        photo (bool): Place the receipt on a larger noisy background like a phone photo
+        canvas_size (Tuple[int, int]): Photo size in pixels (width, height)
+
+    Returns:
+        Tuple[Image.Image, Dict]: RGB image and expected extraction result
+    """
+    rng = random.Random(seed)
+    lines, truth = _receipt_lines(rng)
+
+    font_size = rng.randint(36, 56)
+    font = _load_font(font_size)
+    line_height = int(font_size * 1.4)
+    receipt = Image.new('RGB', (font_size * 18, line_height * (len(lines) + 2)), color='white')
+    draw = ImageDraw.Draw(receipt)
+    for i, line in enumerate(lines):
+        draw.text((font_size, line_height * (i + 1)), line, fill='black', font=font)
+
+    if not photo:
+        return receipt, truth
+
+    # Darker textured background with the receipt placed off-centre
+    shade = rng.randint(60, 120)
+    background = Image.effect_noise(canvas_size, 25).convert('RGB')
+    background = Image.blend(background, Image.new('RGB', canvas_size, (shade, shade - 10, shade - 20)), 0.7)
+    max_x = max(canvas_size[0] - receipt.width, 1)
+    max_y = max(canvas_size[1] - receipt.height, 1)
+    background.paste(receipt, (rng.randrange(max_x), rng.randrange(max_y)))
+    return background.filter(ImageFilter.GaussianBlur(1)), truth
+
+
+def encode_image(image: Image.Image, file_format: str = 'PNG') -> bytes:
+    """Encode a PIL image into file bytes"""
+    buffer = io.BytesIO()
+    image.save(buffer, format=file_format)
+    return buffer.getvalue()
+
+
+def render_pdf(seeds: List[int]) -> Tuple[bytes, List[Dict]]:
+    """
+    Render a scanned multi-page PDF with one receipt per page
+
+    Args:
+        seeds (List[int]): One seed per page
+
+    Returns:
+        Tuple[bytes, List[Dict]]: PDF bytes and expected result per page
+    """
+    pages, truths = [], []
+    for seed in seeds:
+        page, truth = render_receipt(seed, photo=False)
+        pages.append(page)
+        truths.append(truth)
+
+    buffer = io.BytesIO()
+    pages[0].save(buffer, format='PDF', save_all=True, append_images=pages[1:], resolution=300)
+    return buffer.getvalue(), truths
+
+
+def build_corpus(count: int, seed: int = 0, photo: bool = True) -> List[Tuple[bytes, str, Dict]]:
+    """
+    Build an in-memory corpus of encoded receipts
+
+    Args:
+        count (int): Number of receipts
+        seed (int): Base seed
+        photo (bool): Render as phone-photo style images
+
+    Returns:
+        List[Tuple[bytes, str, Dict]]: (file bytes, file type, expected result)
+    """
+    corpus = []
+    for i in range(count):
+        image, truth = render_receipt(seed + i, photo=photo)
+        corpus.append((encode_image(image, 'JPEG'), 'jpg', truth))
+    return corpus
+
+
+def field_accuracy(results: List[Dict], truths: List[Dict]) -> Dict[str, float]:
+    """
+    Share of receipts where each extracted field matches the expected value
+
+    Args:
+        results (List[Dict]): process_receipt results
+        truths (List[Dict]): Expected results in the same order
+
+    Returns:
+        Dict[str, float]: Accuracy per field between 0 and 1
+    """
+    accuracy = {}
+    for field in ('extractedAmount', 'extractedDate', 'extractedMerchant'):
+        matches = sum(1 for result, truth in zip(results, truths) if result.get(field) == truth[field])
+        accuracy[field] = round(matches / len(truths), 3) if truths else 0.0
+    return accuracy
+
+
+def build_statement_text(lines: int, seed: int = 0) -> str:
+    """
+    Build a long bank-statement style text, one transaction per line
+
+    Args:
+        lines (int): Number of transaction lines
+        seed (int): Seed making the text reproducible
+
+    Returns:
+        str: Statement text
+    """
+    rng = random.Random(seed)
+    start = date(2024, 1, 1)
+    rows = [f"{rng.choice(MERCHANTS)} ACCOUNT STATEMENT", '']
+    for _ in range(lines):
+        posted = start + timedelta(days=rng.randrange(365))
+        amount = rng.uniform(0.99, 999.99)
+        rows.append(rng.choice([
+            f"{posted.strftime('%m/%d/%Y')} CARD PAYMENT {rng.choice(MERCHANTS)} ${amount:.2f}",
+            f"{posted.strftime('%d %B %Y')} {rng.choice(ITEMS)} {amount:.2f} USD",
+            f"{posted.strftime('%B %d, %Y')} TRANSFER REF {rng.randint(100000, 999999)} AMOUNT: {amount:.2f}",
+        ]))
+    rows += ['', f"TOTAL: ${rng.uniform(1000, 9999):.2f}"]
+    return '\n'.join(rows)
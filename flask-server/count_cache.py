@@ -0,0 +1,176 @@
+"""
+Count Cache Module
+Total counts for paginated listings with selectable cost/accuracy strategies
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+from bson import json_util
+from pymongo.errors import ExecutionTimeout
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Exact count on every request
+EXACT = 'exact'
+# Exact count if it finishes within a time budget, else capped
+ESTIMATED = 'estimated'
+# Count stops at the cap, reported as e.g. "1000+"
+CAPPED = 'capped'
+# Exact count reused for a short TTL until the user's data changes (invalidation is per process)
+CACHED = 'cached'
+
+COUNT_STRATEGIES = (EXACT, ESTIMATED, CAPPED, CACHED)
+
+
+class CountCache:
+    """Counts documents matching a per-user query, caching exact counts per user and filter"""
+
+    def __init__(self, default_strategy: Optional[str] = None, ttl: Optional[float] = None,
+                 max_entries: Optional[int] = None, cap: Optional[int] = None,
+                 estimate_max_ms: Optional[int] = None):
+        """
+        Initialize count configuration
+
+        Args:
+            default_strategy (str): Strategy used when a request names none
+            ttl (float): Seconds a cached count stays valid
+            max_entries (int): Cached counts kept, least recently used dropped first
+            cap (int): Largest count the capped strategy reports exactly
+            estimate_max_ms (int): Time budget of the exact count in the estimated strategy
+
+        Raises:
+            ValueError: If the default strategy is unknown
+        """
+        self.default_strategy = self.validate_strategy(
+            default_strategy or os.getenv('COUNT_STRATEGY', EXACT))
+        self.ttl = ttl if ttl is not None else float(os.getenv('COUNT_CACHE_TTL', 30))
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv('COUNT_CACHE_SIZE', 1024))
+        self.cap = cap if cap is not None else int(os.getenv('COUNT_CAP', 1000))
+        self.estimate_max_ms = estimate_max_ms if estimate_max_ms is not None else int(
+            os.getenv('COUNT_ESTIMATE_MAX_MS', 50))
+
+        self._entries = OrderedDict()
+        self._generations = {}
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+    @staticmethod
+    def validate_strategy(strategy: str) -> str:
+        """
+        Normalize a strategy name
+
+        Raises:
+            ValueError: If the strategy is unknown
+        """
+        normalized = strategy.strip().lower()
+        if normalized not in COUNT_STRATEGIES:
+            raise ValueError(f"Unsupported count strategy: {strategy}. Use one of {', '.join(COUNT_STRATEGIES)}.")
+        return normalized
+
+    def _key(self, user_id: str, query: Dict) -> tuple:
+        """Cache key of a user's query at the user's current generation"""
+        normalized = json_util.dumps(query, sort_keys=True)
+        with self._lock:
+            return str(user_id), self._generations.get(str(user_id), 0), normalized
+
+    def count(self, collection, user_id: str, query: Dict, strategy: Optional[str] = None) -> Dict:
+        """
+        Count the documents matching a query
+
+        Args:
+            collection: pymongo collection
+            user_id (str): Owner of the documents, for cache invalidation
+            query (Dict): Filter, including the user condition
+            strategy (str): One of COUNT_STRATEGIES, defaults to the configured one
+
+        Returns:
+            Dict: 'totalItems', 'totalIsExact' and the 'countStrategy' used
+        """
+        strategy = self.validate_strategy(strategy) if strategy else self.default_strategy
+
+        if strategy == EXACT:
+            return self._result(collection.count_documents(query), True, strategy)
+
+        if strategy == CAPPED:
+            return self._capped(collection, query, strategy)
+
+        if strategy == ESTIMATED:
+            try:
+                return self._result(collection.count_documents(query, maxTimeMS=self.estimate_max_ms),
+                                    True, strategy)
+            except ExecutionTimeout:
+                return self._capped(collection, query, strategy)
+
+        key = self._key(user_id, query)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                self._counters['hits'] += 1
+                return self._result(entry[0], True, strategy, cached=True)
+            self._counters['misses'] += 1
+
+        total = collection.count_documents(query)
+        with self._lock:
+            self._entries[key] = (total, now + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return self._result(total, True, strategy, cached=False)
+
+    def _capped(self, collection, query: Dict, strategy: str) -> Dict:
+        """Count at most cap + 1 documents"""
+        total = collection.count_documents(query, limit=self.cap + 1)
+        if total > self.cap:
+            return self._result(self.cap, False, strategy)
+        return self._result(total, True, strategy)
+
+    @staticmethod
+    def _result(total: int, exact: bool, strategy: str, cached: Optional[bool] = None) -> Dict:
+        """Count metadata for a pagination block"""
+        result = {
+            'totalItems': total,
+            'totalIsExact': exact,
+            'totalLabel': str(total) if exact else f"{total}+",
+            'countStrategy': strategy
+        }
+        if cached is not None:
+            result['countCached'] = cached
+        return result
+
+    def invalidate(self, user_id: str):
+        """
+        Drop every cached count of a user after their documents change
+
+        Bumping the user's generation makes old keys unreachable; they age
+        out of the LRU instead of being searched for.
+        """
+        with self._lock:
+            self._generations[str(user_id)] = self._generations.get(str(user_id), 0) + 1
+            self._counters['invalidations'] += 1
+
+    def stats(self) -> Dict:
+        """
+        Get hit/miss counters
+
+        Returns:
+            Dict: Count cache statistics
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            entries = len(self._entries)
+
+        lookups = counters['hits'] + counters['misses']
+        return {
+            **counters,
+            'hitRate': round(counters['hits'] / lookups, 4) if lookups else 0.0,
+            'entries': entries,
+            'maxEntries': self.max_entries,
+            'defaultStrategy': self.default_strategy
+        }
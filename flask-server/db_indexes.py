@@ -0,0 +1,192 @@
+"""
+Database Indexes Module
+Registry of the MongoDB indexes the service's queries rely on, with creation and usage reporting
+"""
+
+import os
+import logging
+from typing import Dict, List
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel, MongoClient
+from pymongo.errors import OperationFailure, PyMongoError
+from search import backfill_search_tokens
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Declared indexes by collection. Listing indexes end in _id so keyset
+# pagination ties are resolved inside the index.
+INDEXES: Dict[str, List[IndexModel]] = {
+    'transactions': [
+        # Default listing: newest first per user
+        IndexModel([('user_id', ASCENDING), ('date', DESCENDING), ('_id', DESCENDING)],
+                   name='user_date'),
+        IndexModel([('user_id', ASCENDING), ('type', ASCENDING), ('date', DESCENDING), ('_id', DESCENDING)],
+                   name='user_type_date'),
+        IndexModel([('user_id', ASCENDING), ('category', ASCENDING), ('date', DESCENDING), ('_id', DESCENDING)],
+                   name='user_category_date'),
+        IndexModel([('user_id', ASCENDING), ('paymentMethod', ASCENDING), ('date', DESCENDING),
+                    ('_id', DESCENDING)], name='user_payment_date'),
+        IndexModel([('user_id', ASCENDING), ('tags', ASCENDING), ('date', DESCENDING)],
+                   name='user_tags_date'),
+        # Amount range filters and sortBy=amount
+        IndexModel([('user_id', ASCENDING), ('amount', DESCENDING), ('_id', DESCENDING)],
+                   name='user_amount'),
+        # Prefix search over the multikey searchTokens (see search.py)
+        IndexModel([('user_id', ASCENDING), ('searchTokens', ASCENDING), ('date', DESCENDING),
+                    ('_id', DESCENDING)], name='user_search_date'),
+        # Ranked full-text search (searchMode=text), scoped by user_id equality
+        IndexModel([('user_id', ASCENDING), ('description', TEXT), ('merchant', TEXT), ('tags', TEXT)],
+                   name='user_text', weights={'description': 5, 'merchant': 3, 'tags': 2}),
+    ],
+    'users': [
+        # Login lookup and duplicate signup check
+        IndexModel([('email', ASCENDING)], name='email_unique', unique=True),
+    ],
+    'categories': [
+        # Duplicate check on create: name with the user's or default categories
+        IndexModel([('userId', ASCENDING), ('name', ASCENDING)], name='user_name'),
+        IndexModel([('isDefault', ASCENDING), ('name', ASCENDING)], name='default_name'),
+    ],
+}
+
+# Representative query shapes and the index each is expected to use
+QUERY_SHAPES = [
+    {'collection': 'transactions', 'index': 'user_date',
+     'filter': {'user_id': '__shape__'}, 'sort': [('date', DESCENDING), ('_id', DESCENDING)]},
+    {'collection': 'transactions', 'index': 'user_type_date',
+     'filter': {'user_id': '__shape__', 'type': 'expense'}, 'sort': [('date', DESCENDING), ('_id', DESCENDING)]},
+    {'collection': 'transactions', 'index': 'user_category_date',
+     'filter': {'user_id': '__shape__', 'category': '__shape__'},
+     'sort': [('date', DESCENDING), ('_id', DESCENDING)]},
+    {'collection': 'transactions', 'index': 'user_amount',
+     'filter': {'user_id': '__shape__'}, 'sort': [('amount', DESCENDING), ('_id', DESCENDING)]},
+    {'collection': 'transactions', 'index': 'user_search_date',
+     'filter': {'user_id': '__shape__', 'searchTokens': {'$all': ['co', 'coffee']}},
+     'sort': [('date', DESCENDING), ('_id', DESCENDING)]},
+    {'collection': 'users', 'index': 'email_unique', 'filter': {'email': '__shape__'}, 'sort': None},
+    {'collection': 'categories', 'index': 'user_name',
+     'filter': {'userId': '__shape__', 'name': '__shape__'}, 'sort': None},
+]
+
+
+def ensure_indexes(db) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Create every declared index that does not exist yet
+
+    Creation is idempotent: an index with the same keys, options and name
+    is left alone. An index that conflicts with an existing one (e.g. a
+    unique index over duplicate data) is reported and skipped.
+
+    Args:
+        db: pymongo database
+
+    Returns:
+        Dict[str, Dict[str, List[str]]]: Per collection, 'created',
+            'existing' and 'failed' index names
+    """
+    report = {}
+    for collection_name, models in INDEXES.items():
+        collection = db[collection_name]
+        existing = set(collection.index_information())
+        result = {'created': [], 'existing': [], 'failed': []}
+
+        for model in models:
+            name = model.document['name']
+            if name in existing:
+                result['existing'].append(name)
+                continue
+            try:
+                collection.create_indexes([model])
+                result['created'].append(name)
+                logger.info(f"Created index {collection_name}.{name}")
+            except OperationFailure as e:
+                result['failed'].append(name)
+                logger.warning(f"Could not create index {collection_name}.{name}: {str(e)}")
+
+        report[collection_name] = result
+    return report
+
+
+def ensure_indexes_at_startup(mongo_uri: str, db_name: str):
+    """
+    Ensure indexes with a short-lived client, logging instead of raising
+
+    Transactions stored before search indexing get their searchTokens in
+    the same pass unless SEARCH_BACKFILL_ON_STARTUP is false. A separate
+    client keeps the application's client unconnected until it is first
+    used, so a preloaded app still forks cleanly.
+
+    Args:
+        mongo_uri (str): MongoDB connection string
+        db_name (str): Database name
+    """
+    try:
+        with MongoClient(mongo_uri, serverSelectionTimeoutMS=5000) as startup_client:
+            report = ensure_indexes(startup_client[db_name])
+            created = sum(len(result['created']) for result in report.values())
+            failed = sum(len(result['failed']) for result in report.values())
+            logger.info(f"Ensured MongoDB indexes: {created} created, {failed} failed")
+
+            if os.getenv('SEARCH_BACKFILL_ON_STARTUP', 'true').lower() == 'true':
+                backfilled = backfill_search_tokens(startup_client[db_name]['transactions'])
+                if backfilled:
+                    logger.info(f"Backfilled searchTokens of {backfilled} transactions")
+    except PyMongoError as e:
+        logger.warning(f"Skipped ensuring MongoDB indexes: {str(e)}")
+
+
+def _plan_indexes(plan: Dict) -> List[str]:
+    """Index names used anywhere in an explain plan tree"""
+    names = [plan['indexName']] if 'indexName' in plan else []
+    for child_key in ('inputStage', 'queryPlan'):
+        if child_key in plan:
+            names += _plan_indexes(plan[child_key])
+    for child in plan.get('inputStages', []):
+        names += _plan_indexes(child)
+    return names
+
+
+def index_report(db) -> Dict:
+    """
+    Compare declared indexes with the database and its usage counters
+
+    Args:
+        db: pymongo database
+
+    Returns:
+        Dict: Per collection the 'missing' declared indexes, 'unused' ones
+            (no operations since the server started per $indexStats) and
+            'undeclared' ones, plus the index each query shape's winning
+            plan uses
+    """
+    report = {'collections': {}, 'queryShapes': []}
+
+    for collection_name, models in INDEXES.items():
+        collection = db[collection_name]
+        declared = {model.document['name'] for model in models}
+        usage = {stats['name']: stats['accesses']['ops'] for stats in collection.aggregate([{'$indexStats': {}}])}
+        existing = set(usage) | set(collection.index_information())
+
+        report['collections'][collection_name] = {
+            'missing': sorted(declared - existing),
+            'unused': sorted(name for name in existing if name != '_id_' and usage.get(name, 0) == 0),
+            'undeclared': sorted(name for name in existing - declared if name != '_id_'),
+            'ops': usage,
+        }
+
+    for shape in QUERY_SHAPES:
+        cursor = db[shape['collection']].find(shape['filter'])
+        if shape['sort']:
+            cursor = cursor.sort(shape['sort'])
+        winning_plan = cursor.explain()['queryPlanner']['winningPlan']
+        used = _plan_indexes(winning_plan)
+        report['queryShapes'].append({
+            'collection': shape['collection'],
+            'filter': sorted(shape['filter']),
+            'sort': [field for field, _ in shape['sort']] if shape['sort'] else [],
+            'expectedIndex': shape['index'],
+            'usedIndexes': used,
+            'ok': shape['index'] in used,
+        })
+
+    return report
@@ -0,0 +1,70 @@
+"""
+Gunicorn Configuration
+Production serving profile for the Flask OCR service
+
+Usage:
+    cd flask-server && gunicorn -c gunicorn.conf.py app:app
+"""
+
+import os
+import multiprocessing
+
+cores = multiprocessing.cpu_count()
+
+# Bind to the same port as the development server
+bind = os.getenv('GUNICORN_BIND', f"0.0.0.0:{os.getenv('FLASK_PORT', 5001)}")
+
+# Threaded workers: Mongo routes and OCR requests mostly wait (on the
+# database or on the OCR worker pool), so threads keep them concurrent
+# while CPU-bound OCR runs in the pool's own processes.
+# A single server worker by default: async OCR jobs and count cache
+# invalidation live in process memory, so with several workers a job poll
+# or a changed total can land on a worker that never saw it. The OCR pool,
+# not the server worker count, provides CPU parallelism.
+worker_class = 'gthread'
+workers = int(os.getenv('GUNICORN_WORKERS', 1))
+threads = int(os.getenv('GUNICORN_THREADS', 16))
+
+# Every server worker starts its own OCR pool; share the cores among them
+# instead of each pool defaulting to the full CPU count
+os.environ.setdefault('OCR_POOL_SIZE', str(max(cores // workers, 1)))
+# Likewise page-parallel PDF OCR within each pool process
+os.environ.setdefault('OCR_PDF_PAGE_WORKERS',
+                      str(max(cores // (workers * max(int(os.environ['OCR_POOL_SIZE']), 1)), 1)))
+os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+
+# Import the app (OCR processor, Mongo client, caches) once in the master.
+# OCR pools start in post_fork; job threads and Mongo connections lazily.
+preload_app = True
+
+# Worker recycling drops queued and finished async OCR jobs, so it is off
+# by default; OCR itself runs in separate pool processes
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+# Allow a full OCR pool timeout plus margin; let in-flight OCR finish on reload
+timeout = int(os.getenv('GUNICORN_TIMEOUT', int(float(os.getenv('OCR_POOL_TIMEOUT', 60))) + 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+
+def on_starting(server):
+    """Create missing MongoDB indexes once, before any worker starts"""
+    if os.getenv('MONGO_ENSURE_INDEXES', 'true').lower() == 'true':
+        from db_indexes import ensure_indexes_at_startup
+        ensure_indexes_at_startup(os.getenv('MONGO_URI', 'mongodb://localhost:27017/finly'), 'finly')
+
+
+def post_fork(server, worker):
+    """Start and warm the worker's OCR pool before it accepts requests"""
+    from app import ocr_pool
+    ocr_pool.start()
+
+
+def worker_exit(server, worker):
+    """Stop the exiting worker's OCR processes along with it"""
+    from app import ocr_pool
+    ocr_pool.shutdown(wait=False)
@@ -0,0 +1,365 @@
+"""
+Metrics Module
+In-process counters, gauges and histograms rendered in the Prometheus text format
+"""
+
+import os
+import time
+import logging
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from flask import Flask, Response, g, request
+from pymongo import monitoring
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds for request and OCR latency histograms
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Finer buckets for database commands
+MONGO_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the text format"""
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    """Render {name="value",...} or an empty string"""
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+def _format_value(value: float) -> str:
+    """Render a sample value, using Prometheus spellings for infinities"""
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    """Labelled metric family with one lock for all of its series"""
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Sequence) -> Tuple[str, ...]:
+        """Label values as a series key"""
+        if len(labels) != len(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(value) for value in labels)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        """(sample name, rendered labels, value) for every series"""
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        """Text format lines for this family"""
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+        lines += [f'{name}{labels} {_format_value(value)}' for name, labels, value in self.samples()]
+        return lines
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+
+    kind = 'counter'
+
+    def inc(self, *labels, amount: float = 1.0):
+        """Add to the series for the given label values"""
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0.0) + amount
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        with self._lock:
+            series = list(self._series.items())
+        return [(self.name, _format_labels(self.label_names, key), value) for key, value in series]
+
+
+class Gauge(_Metric):
+    """Value that goes up and down"""
+
+    kind = 'gauge'
+
+    def inc(self, *labels, amount: float = 1.0):
+        """Raise the series for the given label values"""
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0.0) + amount
+
+    def dec(self, *labels, amount: float = 1.0):
+        """Lower the series for the given label values"""
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels):
+        """Replace the series value"""
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = value
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        with self._lock:
+            series = list(self._series.items())
+        return [(self.name, _format_labels(self.label_names, key), value) for key, value in series]
+
+
+class Histogram(_Metric):
+    """Distribution of observations over fixed buckets"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels):
+        """Record one observation for the given label values"""
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts (last slot is +Inf), sum, count
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        with self._lock:
+            series = [(key, list(counts), total, count) for key, (counts, total, count) in self._series.items()]
+
+        samples = []
+        label_names = self.label_names + ('le',)
+        for key, counts, total, count in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                samples.append((f'{self.name}_bucket',
+                                _format_labels(label_names, key + (_format_value(float(bound)),)), cumulative))
+            labels = _format_labels(self.label_names, key)
+            samples.append((f'{self.name}_sum', labels, round(total, 6)))
+            samples.append((f'{self.name}_count', labels, count))
+        return samples
+
+
+class MetricsRegistry:
+    """Named metrics plus collectors that read live statistics at scrape time"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        """Add a metric, returning the existing one of the same name"""
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> Counter:
+        """Get or create a counter"""
+        return self._register(Counter(name, help_text, label_names))
+
+    def gauge(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> Gauge:
+        """Get or create a gauge"""
+        return self._register(Gauge(name, help_text, label_names))
+
+    def histogram(self, name: str, help_text: str, label_names: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """Get or create a histogram"""
+        return self._register(Histogram(name, help_text, label_names, buckets))
+
+    def register_collector(self, collector: Callable[[], Iterable[Tuple[str, str, str, Dict, float]]]):
+        """
+        Register a callable read at every scrape
+
+        Args:
+            collector (Callable): Returns (name, type, help, labels, value)
+                tuples, e.g. counters kept by another component
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text format
+
+        Returns:
+            str: Exposition text
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+
+        lines = []
+        for metric in metrics:
+            lines += metric.render()
+
+        # Collected samples, grouped by family so each gets one HELP/TYPE header
+        families = {}
+        for collector in collectors:
+            try:
+                for name, kind, help_text, labels, value in collector():
+                    families.setdefault(name, (kind, help_text, []))[2].append((labels, value))
+            except Exception as e:
+                logger.warning(f"Metrics collector failed: {str(e)}")
+
+        for name, (kind, help_text, samples) in families.items():
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+            for labels, value in samples:
+                lines.append(f'{name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}')
+
+        return '\n'.join(lines) + '\n'
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """pymongo command listener timing every database command"""
+
+    def __init__(self, registry: MetricsRegistry):
+        """
+        Initialize listener metrics
+
+        Args:
+            registry (MetricsRegistry): Registry receiving the metrics
+        """
+        self.duration = registry.histogram(
+            'mongo_command_duration_seconds', 'MongoDB command round-trip time', ('command',), MONGO_BUCKETS)
+        self.failures = registry.counter(
+            'mongo_command_failures_total', 'MongoDB commands that returned an error', ('command',))
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self.duration.observe(event.duration_micros / 1e6, event.command_name)
+
+    def failed(self, event):
+        self.duration.observe(event.duration_micros / 1e6, event.command_name)
+        self.failures.inc(event.command_name)
+
+
+class RequestMetrics:
+    """Per-route latency histogram and in-flight gauge for a Flask app"""
+
+    def __init__(self, registry: MetricsRegistry):
+        """
+        Initialize request metrics
+
+        Args:
+            registry (MetricsRegistry): Registry receiving the metrics
+        """
+        self.duration = registry.histogram(
+            'http_request_duration_seconds', 'Time spent handling HTTP requests', ('method', 'route', 'status'))
+        self.in_flight = registry.gauge('http_requests_in_flight', 'HTTP requests being handled')
+
+    def init_app(self, app: Flask):
+        """Install request hooks on the app"""
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    def _before_request(self):
+        g.metrics_start = time.perf_counter()
+        self.in_flight.inc()
+
+    def _after_request(self, response):
+        g.metrics_status = response.status_code
+        return response
+
+    def _teardown_request(self, error=None):
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return
+        self.in_flight.dec()
+
+        # Templated rule keeps label cardinality bounded (e.g. /api/categories/<id>)
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        status = g.pop('metrics_status', 500)
+        self.duration.observe(time.perf_counter() - start, request.method, route, status)
+
+
+class OCRMetrics:
+    """OCR stage timings and tier usage from process_receipt debug output"""
+
+    def __init__(self, registry: MetricsRegistry):
+        """
+        Initialize OCR metrics
+
+        Args:
+            registry (MetricsRegistry): Registry receiving the metrics
+        """
+        self.stage_duration = registry.histogram(
+            'ocr_stage_duration_seconds', 'Time per OCR stage (decode, preprocess.*, tesseract, parse, ...)',
+            ('stage', 'tier'))
+        self.receipts = registry.counter('ocr_receipts_total', 'Receipts OCR\'d by the tier that produced them',
+                                         ('tier',))
+
+    def observe_result(self, result: Dict):
+        """
+        Record the stage timings carried in a result's 'debug' section
+
+        Args:
+            result (Dict): process_receipt result produced with debug=True
+        """
+        debug = result.get('debug') or {}
+        for attempt in debug.get('tiers', []):
+            for stage, ms in attempt['timingsMs'].items():
+                self.stage_duration.observe(ms / 1000, stage, attempt['tier'])
+        if result.get('ocrTier'):
+            self.receipts.inc(result['ocrTier'])
+
+
+def metrics_enabled() -> bool:
+    """Whether metrics collection is switched on (METRICS_ENABLED)"""
+    return os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+
+
+def metrics_response(registry: MetricsRegistry) -> Response:
+    """Flask response with the registry in the Prometheus text format"""
+    return Response(registry.render(), mimetype=CONTENT_TYPE)
+
+
+def stats_collector(prefix: str, stats: Callable[[], Dict], counters: Sequence[str] = (),
+                    gauges: Sequence[str] = (), labels: Optional[Dict] = None) -> Callable:
+    """
+    Build a collector exposing selected numeric fields of a stats() dict
+
+    Args:
+        prefix (str): Metric name prefix, e.g. 'ocr_cache'
+        stats (Callable[[], Dict]): Returns the current statistics
+        counters (Sequence[str]): Fields exposed as <prefix>_<snake_name>_total
+        gauges (Sequence[str]): Fields exposed as <prefix>_<snake_name>
+        labels (Dict): Constant labels added to every sample
+
+    Returns:
+        Callable: Collector for MetricsRegistry.register_collector
+    """
+    def snake(name: str) -> str:
+        return ''.join('_' + char.lower() if char.isupper() else char for char in name)
+
+    def collect():
+        values = stats()
+        for field in counters:
+            yield (f'{prefix}_{snake(field)}_total', 'counter', f'{prefix} {field}', labels or {},
+                   float(values[field]))
+        for field in gauges:
+            yield (f'{prefix}_{snake(field)}', 'gauge', f'{prefix} {field}', labels or {}, float(values[field]))
+
+    return collect
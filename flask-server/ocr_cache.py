@@ -0,0 +1,237 @@
+"""
+OCR Result Cache Module
+Content-addressed cache of receipt OCR results with memory and disk tiers
+"""
+
+import os
+import copy
+import json
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class OCRResultCache:
+    """Two-tier (in-memory LRU + optional on-disk) cache of OCR results"""
+
+    def __init__(self, max_entries: Optional[int] = None, ttl: Optional[float] = None,
+                 disk_dir: Optional[str] = None, disk_max_bytes: Optional[int] = None):
+        """
+        Initialize cache configuration
+
+        Args:
+            max_entries (int): In-memory LRU capacity, 0 disables caching
+            ttl (float): Seconds an entry stays valid in either tier
+            disk_dir (str): Directory for the on-disk tier, None disables it
+            disk_max_bytes (int): Size budget of the on-disk tier
+        """
+        self.max_entries = max_entries if max_entries is not None else int(os.getenv('OCR_CACHE_SIZE', 256))
+        self.ttl = ttl if ttl is not None else float(os.getenv('OCR_CACHE_TTL', 24 * 60 * 60))
+        self.disk_dir = disk_dir if disk_dir is not None else (os.getenv('OCR_CACHE_DIR') or None)
+        self.disk_max_bytes = disk_max_bytes if disk_max_bytes is not None else int(
+            os.getenv('OCR_CACHE_DISK_MAX_BYTES', 100 * 1024 * 1024))
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._disk_bytes = 0
+        self._counters = {'memoryHits': 0, 'diskHits': 0, 'misses': 0, 'evictions': 0}
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._scan_disk())
+
+    @property
+    def enabled(self) -> bool:
+        """Whether any cache tier is active"""
+        return self.max_entries > 0 or bool(self.disk_dir)
+
+    @staticmethod
+    def make_key(data: bytes, fingerprint: str) -> str:
+        """
+        Build a cache key from file contents and OCR configuration
+
+        Args:
+            data (bytes): Uploaded file contents
+            fingerprint (str): OCR configuration fingerprint
+
+        Returns:
+            str: Hex digest identifying the result
+        """
+        digest = hashlib.sha256(data)
+        digest.update(b'\0')
+        digest.update(fingerprint.encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Look up a cached result
+
+        Args:
+            key (str): Cache key from make_key
+
+        Returns:
+            Optional[Dict]: Copy of the cached result or None
+        """
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._counters['memoryHits'] += 1
+                    return copy.deepcopy(value)
+                del self._entries[key]
+
+        value = self._read_disk(key, now)
+        with self._lock:
+            if value is None:
+                self._counters['misses'] += 1
+                return None
+            self._counters['diskHits'] += 1
+
+        # Promote disk hits into the memory tier
+        self._set_memory(key, value, now)
+        return copy.deepcopy(value)
+
+    def set(self, key: str, value: Dict):
+        """
+        Store a result in every enabled tier
+
+        Args:
+            key (str): Cache key from make_key
+            value (Dict): JSON-serializable OCR result
+        """
+        now = time.time()
+        self._set_memory(key, copy.deepcopy(value), now)
+        self._write_disk(key, value)
+
+    def _set_memory(self, key: str, value: Dict, now: float):
+        """Insert into the LRU tier, evicting the least recently used entries"""
+        if self.max_entries <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (now + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters['evictions'] += 1
+
+    def _disk_path(self, key: str) -> str:
+        """Location of a key in the on-disk tier"""
+        return os.path.join(self.disk_dir, key[:2], f"{key}.json")
+
+    def _read_disk(self, key: str, now: float) -> Optional[Dict]:
+        """Read an unexpired entry from the on-disk tier"""
+        if not self.disk_dir:
+            return None
+
+        path = self._disk_path(key)
+        try:
+            if os.path.getmtime(path) + self.ttl <= now:
+                self._remove_disk_file(path)
+                return None
+            with open(path, 'r', encoding='utf-8') as cache_file:
+                return json.load(cache_file)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding unreadable OCR cache entry {key}: {str(e)}")
+            self._remove_disk_file(path)
+            return None
+
+    def _write_disk(self, key: str, value: Dict):
+        """Atomically write an entry to the on-disk tier"""
+        if not self.disk_dir:
+            return
+
+        path = self._disk_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            payload = json.dumps(value).encode('utf-8')
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            with os.fdopen(fd, 'wb') as cache_file:
+                cache_file.write(payload)
+            os.replace(temp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Could not write OCR cache entry {key}: {str(e)}")
+            return
+
+        with self._disk_lock:
+            self._disk_bytes += len(payload)
+            over_budget = self._disk_bytes > self.disk_max_bytes
+
+        if over_budget:
+            self._evict_disk()
+
+    def _scan_disk(self):
+        """List (path, size, mtime) of every on-disk entry"""
+        for root, _, files in os.walk(self.disk_dir):
+            for name in files:
+                if not name.endswith('.json'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+
+    def _evict_disk(self):
+        """Drop expired entries, then the oldest ones, until under 90% of the budget"""
+        with self._disk_lock:
+            now = time.time()
+            entries = sorted(self._scan_disk(), key=lambda entry: entry[2])
+            total = sum(size for _, size, _ in entries)
+            target = self.disk_max_bytes * 0.9
+
+            for path, size, mtime in entries:
+                if total <= target and mtime + self.ttl > now:
+                    continue
+                if self._remove_disk_file(path):
+                    total -= size
+                    with self._lock:
+                        self._counters['evictions'] += 1
+
+            self._disk_bytes = total
+
+    def _remove_disk_file(self, path: str) -> bool:
+        """Delete an on-disk entry, ignoring races with other workers"""
+        try:
+            os.unlink(path)
+            return True
+        except OSError:
+            return False
+
+    def stats(self) -> Dict:
+        """
+        Get hit/miss counters and tier sizes
+
+        Returns:
+            Dict: Cache statistics
+        """
+        with self._lock:
+            counters = dict(self._counters)
+            entries = len(self._entries)
+
+        lookups = counters['memoryHits'] + counters['diskHits'] + counters['misses']
+        hits = counters['memoryHits'] + counters['diskHits']
+        return {
+            **counters,
+            'hits': hits,
+            'hitRate': round(hits / lookups, 4) if lookups else 0.0,
+            'memoryEntries': entries,
+            'maxEntries': self.max_entries,
+            'diskEnabled': bool(self.disk_dir),
+            'diskBytes': self._disk_bytes
+        }
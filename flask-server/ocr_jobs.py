@@ -0,0 +1,209 @@
+"""
+OCR Job Queue Module
+Runs OCR work in the background and keeps results for polling by job ID
+"""
+
+import os
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Job states
+QUEUED = 'queued'
+PROCESSING = 'processing'
+COMPLETED = 'completed'
+FAILED = 'failed'
+
+
+class OCRJobQueueFullError(Exception):
+    """Raised when too many jobs are waiting or running"""
+
+
+class OCRJobQueue:
+    """Background job runner with a bounded, expiring result store"""
+
+    def __init__(self, workers: Optional[int] = None, max_pending: Optional[int] = None,
+                 max_stored: Optional[int] = None, ttl: Optional[float] = None):
+        """
+        Initialize job queue configuration
+
+        Args:
+            workers (int): Background threads dispatching jobs
+            max_pending (int): Queued plus running jobs accepted at once
+            max_stored (int): Jobs (including finished ones) kept in the store
+            ttl (float): Seconds finished jobs remain retrievable
+        """
+        self.workers = workers if workers is not None else int(os.getenv('OCR_JOBS_WORKERS', os.cpu_count() or 1))
+        self.max_pending = max_pending if max_pending is not None else int(os.getenv('OCR_JOBS_MAX_PENDING', 100))
+        self.max_stored = max_stored if max_stored is not None else int(os.getenv('OCR_JOBS_MAX_STORED', 1000))
+        self.ttl = ttl if ttl is not None else float(os.getenv('OCR_JOBS_TTL', 60 * 60))
+
+        self._jobs = OrderedDict()
+        self._events = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self._owner_pid = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Start dispatcher threads lazily, once per owning process"""
+        if self._executor is None or self._owner_pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='ocr-job')
+            self._owner_pid = os.getpid()
+        return self._executor
+
+    def _pending_count(self) -> int:
+        """Number of queued or running jobs"""
+        return sum(1 for job in self._jobs.values() if job['status'] in (QUEUED, PROCESSING))
+
+    def _expire(self, now: float):
+        """Drop finished jobs past their TTL, then the oldest finished ones over capacity"""
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job['_expiresAt'] is not None and job['_expiresAt'] <= now]:
+            self._remove(job_id)
+
+        if len(self._jobs) > self.max_stored:
+            finished = [job_id for job_id, job in self._jobs.items() if job['_expiresAt'] is not None]
+            for job_id in finished[:len(self._jobs) - self.max_stored]:
+                self._remove(job_id)
+
+    def _remove(self, job_id: str):
+        """Forget a job"""
+        self._jobs.pop(job_id, None)
+        self._events.pop(job_id, None)
+
+    def _create(self, metadata: Optional[Dict]) -> str:
+        """Register a new queued job; caller holds the lock"""
+        job_id = uuid.uuid4().hex
+        self._jobs[job_id] = {
+            **(metadata or {}),
+            'jobId': job_id,
+            'status': QUEUED,
+            'createdAt': datetime.utcnow().isoformat(),
+            'finishedAt': None,
+            '_expiresAt': None
+        }
+        self._events[job_id] = threading.Event()
+        return job_id
+
+    def submit(self, work: Callable[[], Dict], metadata: Optional[Dict] = None) -> str:
+        """
+        Queue work to run in the background
+
+        Args:
+            work (Callable[[], Dict]): Produces the job result
+            metadata (Dict): Extra fields returned with the job (e.g. filename)
+
+        Returns:
+            str: Job ID
+
+        Raises:
+            OCRJobQueueFullError: If the pending job limit is reached
+        """
+        with self._lock:
+            self._expire(time.time())
+            if self._pending_count() >= self.max_pending:
+                raise OCRJobQueueFullError('Too many OCR jobs in progress, please retry shortly')
+
+            job_id = self._create(metadata)
+            executor = self._get_executor()
+
+        executor.submit(self._run, job_id, work)
+        return job_id
+
+    def complete(self, result: Dict, metadata: Optional[Dict] = None) -> str:
+        """
+        Record an already available result (e.g. a cache hit) as a finished job
+
+        Args:
+            result (Dict): Job result
+            metadata (Dict): Extra fields returned with the job
+
+        Returns:
+            str: Job ID
+        """
+        with self._lock:
+            self._expire(time.time())
+            job_id = self._create(metadata)
+        self._finish(job_id, COMPLETED, result=result)
+        return job_id
+
+    def _run(self, job_id: str, work: Callable[[], Dict]):
+        """Execute a job on a dispatcher thread"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job['status'] = PROCESSING
+
+        try:
+            result = work()
+        except Exception as e:
+            logger.error(f"OCR job {job_id} failed: {str(e)}")
+            self._finish(job_id, FAILED, error=str(e))
+        else:
+            self._finish(job_id, COMPLETED, result=result)
+
+    def _finish(self, job_id: str, status: str, result: Optional[Dict] = None, error: Optional[str] = None):
+        """Store a job outcome and wake up long-polling readers"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job['status'] = status
+            job['finishedAt'] = datetime.utcnow().isoformat()
+            job['_expiresAt'] = time.time() + self.ttl
+            if result is not None:
+                job['result'] = result
+            if error is not None:
+                job['error'] = error
+            event = self._events.get(job_id)
+
+        if event is not None:
+            event.set()
+
+    def get(self, job_id: str, wait: float = 0) -> Optional[Dict]:
+        """
+        Get a job, optionally waiting for it to finish
+
+        Args:
+            job_id (str): Job ID
+            wait (float): Seconds to long-poll for completion
+
+        Returns:
+            Optional[Dict]: Job snapshot, or None if unknown or expired
+        """
+        with self._lock:
+            self._expire(time.time())
+            event = self._events.get(job_id)
+
+        if event is None:
+            return None
+        if wait > 0:
+            event.wait(wait)
+
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return {key: value for key, value in job.items() if not key.startswith('_')}
+
+    def stats(self) -> Dict:
+        """
+        Get job counts by status
+
+        Returns:
+            Dict: Job queue statistics
+        """
+        with self._lock:
+            counts = {QUEUED: 0, PROCESSING: 0, COMPLETED: 0, FAILED: 0}
+            for job in self._jobs.values():
+                counts[job['status']] += 1
+            return {**counts, 'stored': len(self._jobs), 'maxPending': self.max_pending}
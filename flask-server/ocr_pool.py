@@ -0,0 +1,244 @@
+"""
+OCR Worker Pool Module
+Runs receipt OCR in long-lived worker processes with bounded admission
+"""
+
+import os
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
+from ocr_service import OCRProcessor
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# OCR processor owned by the current worker process
+_worker_processor = None
+
+
+def _init_worker():
+    """Create the worker's OCR processor and load Tesseract models once"""
+    global _worker_processor
+    _worker_processor = OCRProcessor()
+    _worker_processor.warm_up()
+
+
+def _run_in_worker(method_name: str, args: tuple, kwargs: dict):
+    """Invoke an OCRProcessor method inside a worker process"""
+    return getattr(_worker_processor, method_name)(*args, **kwargs)
+
+
+class OCRPoolBusyError(Exception):
+    """Raised when the pool queue is full and a job cannot be admitted"""
+
+
+class OCRPoolTimeoutError(Exception):
+    """Raised when a job does not finish within the configured timeout"""
+
+
+class OCRWorkerPool:
+    """Pool of long-lived OCR worker processes"""
+
+    def __init__(self, size: Optional[int] = None, queue_size: Optional[int] = None,
+                 timeout: Optional[float] = None):
+        """
+        Initialize the pool configuration (workers start on first use)
+
+        Args:
+            size (int): Number of worker processes, 0 runs OCR in-process
+            queue_size (int): Jobs allowed to wait beyond the busy workers
+            timeout (float): Seconds to wait for a job result
+        """
+        self.size = size if size is not None else int(os.getenv('OCR_POOL_SIZE', os.cpu_count() or 1))
+        self.queue_size = queue_size if queue_size is not None else int(
+            os.getenv('OCR_POOL_QUEUE_SIZE', self.size * 2))
+        self.timeout = timeout if timeout is not None else float(os.getenv('OCR_POOL_TIMEOUT', 60))
+
+        # Seconds a request may wait for a queue slot before being rejected
+        self.admission_timeout = float(os.getenv('OCR_POOL_ADMISSION_TIMEOUT', 0))
+        self.start_method = os.getenv('OCR_POOL_START_METHOD', 'spawn')
+
+        self._slots = threading.BoundedSemaphore(max(self.size, 1) + self.queue_size)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._owner_pid = None
+        self._local_processor = None
+        self._in_flight = 0
+        self._rejected = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Start the worker processes lazily, once per owning process"""
+        with self._lock:
+            # Executors do not survive fork, so each forked server worker gets its own
+            if self._executor is None or self._owner_pid != os.getpid():
+                # Parallelism comes from the pool and page threads; a single
+                # OpenMP thread per Tesseract keeps the cores from being oversubscribed
+                os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.size,
+                    mp_context=multiprocessing.get_context(self.start_method),
+                    initializer=_init_worker
+                )
+                self._owner_pid = os.getpid()
+                logger.info(f"Started OCR worker pool with {self.size} workers")
+            return self._executor
+
+    def start(self, timeout: Optional[float] = None) -> int:
+        """
+        Start every worker process now and wait until their models are loaded
+
+        Without this the pool starts on the first receipt, which then pays
+        the process spawn and model load cost inside its request timeout.
+
+        Args:
+            timeout (float): Seconds to wait, defaults to the pool timeout
+
+        Returns:
+            int: Distinct worker processes that answered within the timeout
+        """
+        if self.size <= 0:
+            return 0
+
+        executor = self._get_executor()
+        # Workers run their initializer before any task, so a trivial task per worker waits for warm-up
+        futures = [executor.submit(os.getpid) for _ in range(self.size)]
+        try:
+            done, _ = wait(futures, timeout=timeout if timeout is not None else self.timeout)
+            ready = len({future.result() for future in done})
+        except BrokenProcessPool as e:
+            logger.warning(f"OCR worker pool failed to start: {str(e)}")
+            self._reset_executor()
+            return 0
+
+        logger.info(f"OCR worker pool warmed up, {ready} of {self.size} workers answered")
+        return ready
+
+    def _reset_executor(self):
+        """Drop a broken executor so the next submission starts a fresh one"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _run_locally(self, method_name: str, args: tuple, kwargs: dict) -> Future:
+        """Run a job in the calling thread when the pool is disabled"""
+        if self._local_processor is None:
+            self._local_processor = OCRProcessor()
+
+        future = Future()
+        try:
+            future.set_result(getattr(self._local_processor, method_name)(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def _release_slot(self, future: Future):
+        """Return a queue slot once a job finishes"""
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def submit(self, method_name: str, *args, admission_timeout: Optional[float] = None, **kwargs) -> Future:
+        """
+        Submit an OCRProcessor method call to the pool
+
+        Args:
+            method_name (str): Name of the OCRProcessor method to run
+            admission_timeout (float): Seconds to wait for a queue slot,
+                defaults to the configured admission timeout
+
+        Returns:
+            Future: Future resolving to the method's return value
+
+        Raises:
+            OCRPoolBusyError: If no queue slot frees up in time
+        """
+        if admission_timeout is None:
+            admission_timeout = self.admission_timeout
+        if admission_timeout > 0:
+            admitted = self._slots.acquire(timeout=admission_timeout)
+        else:
+            admitted = self._slots.acquire(blocking=False)
+
+        if not admitted:
+            with self._lock:
+                self._rejected += 1
+            raise OCRPoolBusyError('OCR service is busy, please retry shortly')
+
+        with self._lock:
+            self._in_flight += 1
+
+        try:
+            if self.size <= 0:
+                future = self._run_locally(method_name, args, kwargs)
+            else:
+                try:
+                    future = self._get_executor().submit(_run_in_worker, method_name, args, kwargs)
+                except BrokenProcessPool:
+                    logger.warning("OCR worker pool was broken, restarting it")
+                    self._reset_executor()
+                    future = self._get_executor().submit(_run_in_worker, method_name, args, kwargs)
+        except Exception:
+            self._release_slot(None)
+            raise
+
+        future.add_done_callback(self._release_slot)
+        return future
+
+    def run(self, method_name: str, *args, timeout: Optional[float] = None, **kwargs):
+        """
+        Run an OCRProcessor method in the pool and wait for its result
+
+        Args:
+            method_name (str): Name of the OCRProcessor method to run
+            timeout (float): Seconds to wait, defaults to the pool timeout
+
+        Returns:
+            The method's return value
+
+        Raises:
+            OCRPoolBusyError: If the job could not be admitted
+            OCRPoolTimeoutError: If the job did not finish in time
+        """
+        future = self.submit(method_name, *args, **kwargs)
+        try:
+            return future.result(timeout=timeout if timeout is not None else self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise OCRPoolTimeoutError('OCR processing timed out')
+        except BrokenProcessPool:
+            self._reset_executor()
+            raise
+
+    def stats(self) -> Dict:
+        """
+        Get pool configuration and load counters
+
+        Returns:
+            Dict: Pool statistics
+        """
+        with self._lock:
+            return {
+                'size': self.size,
+                'queueSize': self.queue_size,
+                'inFlight': self._in_flight,
+                'rejected': self._rejected,
+                'started': self._executor is not None and self._owner_pid == os.getpid()
+            }
+
+    def worker_pids(self) -> List[int]:
+        """Process IDs of the running worker processes, empty before the pool starts"""
+        with self._lock:
+            if self._executor is None or self._owner_pid != os.getpid():
+                return []
+            return sorted(self._executor._processes or {})
+
+    def shutdown(self, wait: bool = True):
+        """Stop the worker processes"""
+        with self._lock:
+            if self._executor is not None and self._owner_pid == os.getpid():
+                self._executor.shutdown(wait=wait)
+            self._executor = None
@@ -5,19 +5,49 @@ Handles receipt processing, text extraction, and data parsing
 
 import os
 import re
+import json
+import shlex
 import logging
-from datetime import datetime
-from typing import Dict, Optional, List, Tuple
+import subprocess
+import calendar
+import threading
+from bisect import bisect_right
+from contextlib import contextmanager, nullcontext
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, List, Tuple, Union
 import pytesseract
 from PIL import Image, ImageEnhance, ImageFilter
 import cv2
 import numpy as np
-from pdf2image import convert_from_path
+from pdf2image import convert_from_path, pdfinfo_from_path
 import tempfile
+from preprocessing import DEFAULT_STAGES, PreprocessingPipeline, StageTimings, timed
+from receipt_layout import build_lines, extract_structure, lines_from_text, lines_to_text, parse_tsv, words_from_data
+
+try:
+    # Optional persistent Tesseract binding; falls back to the pytesseract CLI
+    import tesserocr
+except ImportError:
+    tesserocr = None
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Month names and abbreviations accepted in dates
+MONTHS = {name.lower(): number for number, name in enumerate(calendar.month_name) if name}
+MONTHS.update({name.lower(): number for number, name in enumerate(calendar.month_abbr) if name})
+MONTHS['sept'] = 9
+
+# Joins rows for batch extraction; cleaning removes it from the text itself
+ROW_SEPARATOR = '\x00'
+
+# Orders in which an all-numeric day/month date can be read
+DATE_ORDERS = ('MDY', 'DMY')
+
+# Characters Tesseract may emit for receipt images
+CHAR_WHITELIST = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz.,:;!?@#$%^&*()_+-=[]{}|\\;\':",./<>?~ '
+
 class OCRProcessor:
     """Main OCR processing class for receipt analysis"""
     
@@ -28,6 +58,80 @@ class OCRProcessor:
         if tesseract_cmd:
             pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
         
+        # Tesseract engine selection: 'auto' uses tesserocr when installed
+        self.ocr_lang = os.getenv('TESSERACT_LANG', 'eng')
+        engine = os.getenv('OCR_ENGINE', 'auto').lower()
+        self.use_persistent_api = tesserocr is not None and engine in ('auto', 'tesserocr')
+        if engine == 'tesserocr' and tesserocr is None:
+            logger.warning("OCR_ENGINE=tesserocr requested but tesserocr is not installed, using pytesseract")
+        
+        # Tesseract settings per input kind
+        self.ocr_profiles = {
+            'image': {'oem': 3, 'psm': 6, 'variables': {'tessedit_char_whitelist': CHAR_WHITELIST}},
+            'pdf': {'oem': 3, 'psm': 6, 'variables': {}},
+        }
+        
+        # Persistent Tesseract API handles, one set per thread
+        self._local = threading.local()
+        
+        # Page-parallel PDF OCR; Tesseract and OpenCV release the GIL. Every
+        # OCR pool process runs its own page threads, so by default the
+        # cores are shared among the pool instead of each taking several
+        pool_size = max(int(os.getenv('OCR_POOL_SIZE', os.cpu_count() or 1)), 1)
+        self.pdf_page_workers = max(1, int(os.getenv('OCR_PDF_PAGE_WORKERS', (os.cpu_count() or 1) // pool_size)))
+        self._page_executor = None
+        self._page_executor_lock = threading.Lock()
+        
+        # PDF rasterization: resolution and pages rendered per pdftoppm call
+        self.pdf_dpi = int(os.getenv('OCR_PDF_DPI', 300))
+        self.pdf_raster_window = max(1, int(os.getenv('OCR_PDF_RASTER_WINDOW', 1)))
+        self.poppler_path = os.getenv('POPPLER_PATH') or None
+        
+        # Embedded text layer fast path for digitally generated PDFs
+        self.pdf_text_layer = os.getenv('OCR_PDF_TEXT_LAYER', 'true').lower() == 'true'
+        self.pdf_text_min_chars = int(os.getenv('OCR_PDF_TEXT_MIN_CHARS', 20))
+        
+        # Preprocessing stages (see preprocessing.STAGES) and their parameters
+        self.preprocess_pipeline = PreprocessingPipeline.parse(os.getenv('OCR_PREPROCESS_STAGES', DEFAULT_STAGES))
+        self.preprocess_settings = {
+            'targetTextHeight': int(os.getenv('OCR_TARGET_TEXT_HEIGHT', 32)),
+            'maxImageSide': int(os.getenv('OCR_MAX_IMAGE_SIDE', 3500)),
+            'maxSkewAngle': float(os.getenv('OCR_MAX_SKEW_ANGLE', 5)),
+            'closeKernel': int(os.getenv('OCR_CLOSE_KERNEL', 2)),
+        }
+        
+        # OCR tiers from cheapest to most thorough; a receipt moves to the
+        # next tier only while a required field is missing or low-confidence
+        self.ocr_tiers = {
+            'fast': {
+                'pipeline': PreprocessingPipeline.parse(os.getenv('OCR_FAST_STAGES', 'crop,resize')),
+                'settings': {
+                    **self.preprocess_settings,
+                    'targetTextHeight': int(os.getenv('OCR_FAST_TARGET_TEXT_HEIGHT', 24)),
+                    'maxImageSide': int(os.getenv('OCR_FAST_MAX_IMAGE_SIDE', 1600)),
+                },
+                # LSTM engine only, no character whitelist
+                'profiles': {
+                    'image': {'oem': 1, 'psm': 6, 'variables': {}},
+                    'pdf': {'oem': 1, 'psm': 6, 'variables': {}},
+                },
+                'pdfDpi': int(os.getenv('OCR_FAST_PDF_DPI', 150)),
+            },
+            'full': {
+                'pipeline': self.preprocess_pipeline,
+                'settings': self.preprocess_settings,
+                'profiles': self.ocr_profiles,
+                'pdfDpi': self.pdf_dpi,
+            },
+        }
+        self.ocr_tier_order = [name.strip().lower() for name in os.getenv('OCR_TIERS', 'fast,full').split(',') if name.strip()]
+        unknown = [name for name in self.ocr_tier_order if name not in self.ocr_tiers]
+        if unknown or not self.ocr_tier_order:
+            raise ValueError(f"Unknown OCR tier(s): {', '.join(unknown) or '(none given)'}. "
+                             f"Available: {', '.join(self.ocr_tiers)}")
+        self.escalate_fields = [name.strip() for name in os.getenv('OCR_ESCALATE_FIELDS', 'amount,date').split(',') if name.strip()]
+        self.escalate_confidence = float(os.getenv('OCR_ESCALATE_CONFIDENCE', 0.6))
+        
         # Common currency symbols and patterns
         self.currency_patterns = [
             r'\$\s*(\d+\.?\d*)',  # $XX.XX
@@ -45,46 +149,157 @@ class OCRProcessor:
             r'(\w+\s+\d{1,2},?\s+\d{2,4})', # Month DD, YYYY
         ]
         
+        # Preferred reading of ambiguous numeric dates like 03/04/2024; the
+        # other order is only used when the preferred one is not a valid date
+        self.date_order = self._validate_date_order(os.getenv('OCR_DATE_ORDER', 'MDY'))
+        
+        # Dates are read from their token shape and memoized per raw string
+        self._numeric_date_regex = re.compile(r'^(\d{1,4})([\/\-\.])(\d{1,2})\2(\d{1,4})$')
+        self._day_first_date_regex = re.compile(r'^(\d{1,2})\s+([^\W\d_]+)\.?\s+(\d{4})$')
+        self._month_first_date_regex = re.compile(r'^([^\W\d_]+)\.?\s+(\d{1,2}),?\s+(\d{4})$')
+        self._parse_date_cached = lru_cache(maxsize=int(os.getenv('OCR_DATE_CACHE_SIZE', 4096)))(self._parse_date_uncached)
+        
         # Merchant name indicators
         self.merchant_indicators = [
             'store', 'shop', 'restaurant', 'cafe', 'market', 'mart',
             'pharmacy', 'gas', 'station', 'hotel', 'motel', 'inn',
             'hospital', 'clinic', 'medical', 'dental'
         ]
+        
+        # Compile extraction patterns once instead of on every call
+        self._currency_regexes = [re.compile(pattern, re.IGNORECASE) for pattern in self.currency_patterns]
+        self._date_regexes = [re.compile(pattern, re.IGNORECASE) for pattern in self.date_patterns]
+        
+        # Single-pass amount scan: one alternation finds the marker every
+        # currency pattern is anchored on, and the named group tells which
+        # patterns read the amount after it (prefix) or before it (suffix)
+        self.single_pass_extraction = os.getenv('OCR_SINGLE_PASS_EXTRACTION', 'true').lower() == 'true'
+        self._amount_scanner = re.compile(r'(?P<dollar>\$)|(?P<usd>USD)|(?P<total>TOTAL)|(?P<amount>AMOUNT)', re.IGNORECASE)
+        self._amount_markers = {
+            'dollar': (0, 1),
+            'usd': (2, 3),
+            'total': (4, None),
+            'amount': (5, None),
+        }
+        self._number_regex = re.compile(r'\d+\.?\d*')
+        self._whitespace_regex = re.compile(r'\s+')
+        self._special_chars_regex = re.compile(r'[^\w\s\$\.\,\:\;\-\/\(\)]')
+        self._batch_special_chars_regex = re.compile(r'[^\w\s\$\.\,\:\;\-\/\(\)\x00]')
+        self._row_edge_regex = re.compile(r' ?\x00 ?')
+        self._non_numeric_regex = re.compile(r'[^\d\.]')
+        self._numeric_line_regex = re.compile(r'^\d+[\d\s\-\(\)]*$')
+        self._phone_number_regex = re.compile(r'^\d{10,}$')
+        self._merchant_indicator_regex = re.compile('|'.join(re.escape(indicator) for indicator in self.merchant_indicators))
+        self._business_name_regex = re.compile(r'\b[A-Z][A-Za-z\s&]+\b')
+        self._capitalized_words_regex = re.compile(r'\b[A-Z][A-Za-z]+(?:\s+[A-Z][A-Za-z]+)*\b')
+    
+    def config_fingerprint(self) -> str:
+        """
+        Describe every setting that can change OCR output
+        
+        Returns:
+            str: Stable fingerprint used to key cached results
+        """
+        settings = {
+            'profiles': self.ocr_profiles,
+            'lang': self.ocr_lang,
+            'persistentApi': self.use_persistent_api,
+            'pdfDpi': self.pdf_dpi,
+            'pdfTextLayer': self.pdf_text_layer,
+            'pdfTextMinChars': self.pdf_text_min_chars,
+            'preprocessStages': self.preprocess_pipeline.spec,
+            'preprocessSettings': self.preprocess_settings,
+            'dateOrder': self.date_order,
+            'tiers': {
+                name: {
+                    'stages': self.ocr_tiers[name]['pipeline'].spec,
+                    'settings': self.ocr_tiers[name]['settings'],
+                    'profiles': self.ocr_tiers[name]['profiles'],
+                    'pdfDpi': self.ocr_tiers[name]['pdfDpi'],
+                } for name in self.ocr_tier_order
+            },
+            'escalateFields': self.escalate_fields,
+            'escalateConfidence': self.escalate_confidence,
+        }
+        return json.dumps(settings, sort_keys=True)
     
-    def process_receipt(self, file_path: str) -> Dict:
+    def process_receipt(self, source: Union[str, bytes, np.ndarray], file_type: Optional[str] = None,
+                        preprocess_stages: Optional[str] = None, debug: bool = False,
+                        structured: bool = False) -> Dict:
         """
-        Process a receipt file and extract relevant information
+        Process a receipt and extract relevant information
+        
+        OCR runs through the configured tiers, cheapest first, and stops at
+        the first tier whose required fields are found with enough
+        confidence. The tier that produced the result is 'ocrTier'.
         
         Args:
-            file_path (str): Path to the receipt file
+            source (Union[str, bytes, np.ndarray]): Path to the receipt file,
+                the raw file contents, or an already decoded BGR image
+            file_type (str): File extension such as 'pdf' or '.jpg'; taken
+                from the path when omitted, required for raw bytes
+            preprocess_stages (str): Comma separated preprocessing stages
+                overriding the configured pipeline for this receipt; only
+                the full tier runs
+            debug (bool): Include per-stage timings under 'debug'
+            structured (bool): Add TOTAL, SUBTOTAL, TAX and line items read
+                from the word layout under 'structure', and take the amount
+                from the identified TOTAL
             
         Returns:
             Dict: Extracted information from the receipt
         """
         try:
-            # Determine file type and extract text
-            file_extension = os.path.splitext(file_path)[1].lower()
+            # Explicit stages pin the receipt to the full tier with those stages
+            if preprocess_stages is not None:
+                tiers = [('full', dict(self.ocr_tiers['full'], pipeline=PreprocessingPipeline.parse(preprocess_stages)))]
+            else:
+                tiers = [(name, self.ocr_tiers[name]) for name in self.ocr_tier_order]
+            timings = StageTimings()
             
-            if file_extension == '.pdf':
-                extracted_text = self._extract_text_from_pdf(file_path)
-            elif file_extension in ['.png', '.jpg', '.jpeg']:
-                extracted_text = self._extract_text_from_image(file_path)
+            # Determine file type
+            if isinstance(source, np.ndarray):
+                file_extension = '.png'
+            elif file_type:
+                file_extension = '.' + file_type.lower().lstrip('.')
+            elif isinstance(source, str):
+                file_extension = os.path.splitext(source)[1].lower()
             else:
+                raise ValueError("File type is required for in-memory receipts")
+            
+            if file_extension not in ['.pdf', '.png', '.jpg', '.jpeg']:
                 raise ValueError(f"Unsupported file type: {file_extension}")
             
-            if not extracted_text.strip():
-                return {
-                    'extractedText': '',
-                    'extractedAmount': None,
-                    'extractedDate': None,
-                    'extractedMerchant': None,
-                    'confidence': 0.0
-                }
+            # Decode images once, whichever tiers run
+            if file_extension != '.pdf':
+                with timed(timings, 'decode'):
+                    source = self._load_image(source)
+                if source is None:
+                    raise ValueError("Could not load image")
             
-            # Extract structured information
-            result = self.extract_from_text(extracted_text)
-            result['extractedText'] = extracted_text
+            attempts = []
+            # PDFs in memory are spooled once for every poppler call of every tier
+            with self._pdf_path(source) if file_extension == '.pdf' else nullcontext(source) as source:
+                for index, (tier_name, tier) in enumerate(tiers):
+                    if index > 0:
+                        timings = StageTimings()
+                    result, ocr_used = self._process_receipt_tier(source, file_extension, tier, timings, structured)
+                    attempts.append({'tier': tier_name, 'preprocessStages': tier['pipeline'].stages,
+                                     'timingsMs': timings.as_dict()})
+                    
+                    # Text layer results are exact; a costlier tier would not change them
+                    if index == len(tiers) - 1 or not ocr_used or not self._needs_escalation(result):
+                        break
+                    logger.info(f"Escalating receipt from OCR tier '{tier_name}': fields {result['fieldConfidence']}")
+            
+            result['ocrTier'] = tier_name
+            
+            if debug:
+                result['debug'] = {
+                    'preprocessStages': tier['pipeline'].stages,
+                    'timingsMs': timings.as_dict(),
+                    'tiers': attempts
+                }
             
             return result
             
@@ -92,117 +307,488 @@ class OCRProcessor:
             logger.error(f"Error processing receipt: {str(e)}")
             raise
     
-    def _extract_text_from_image(self, image_path: str) -> str:
+    def _process_receipt_tier(self, source: Union[str, bytes, np.ndarray], file_extension: str, tier: Dict,
+                              timings: StageTimings, structured: bool) -> Tuple[Dict, bool]:
+        """
+        OCR and parse a receipt with one tier's settings
+        
+        Args:
+            source (Union[str, bytes, np.ndarray]): PDF path or contents, or a decoded image
+            file_extension (str): Normalized extension such as '.pdf'
+            tier (Dict): Tier settings from ocr_tiers
+            timings (StageTimings): Receives per-stage wall time
+            structured (bool): Add line-item structure (see process_receipt)
+            
+        Returns:
+            Tuple[Dict, bool]: Result and whether any text came from OCR
+        """
+        if file_extension == '.pdf':
+            extracted_text, lines = self._extract_text_from_pdf(source, tier, timings)
+        else:
+            extracted_text, lines = self._extract_text_from_image(source, tier, timings)
+        
+        words = [word for line in lines for word in line['words']]
+        
+        if not extracted_text.strip():
+            result = {
+                'extractedText': '',
+                'extractedAmount': None,
+                'extractedDate': None,
+                'extractedMerchant': None,
+                'confidence': 0.0,
+                'fieldConfidence': {'amount': None, 'date': None, 'merchant': None}
+            }
+        else:
+            # Extract structured information, scored by word confidences
+            with timed(timings, 'parse'):
+                result = self.extract_from_text(extracted_text, words=words)
+            result['extractedText'] = extracted_text
+        
+        if structured:
+            with timed(timings, 'structure'):
+                structure = extract_structure(lines, self._parse_amount)
+            total = structure['total']
+            if total:
+                result['extractedAmount'] = total['amount']
+                result['fieldConfidence']['amount'] = 1.0 if total['confidence'] is None else total['confidence']
+                result['confidence'] = self._calculate_confidence(
+                    result['fieldConfidence'], self._clean_text(extracted_text), self._words_confidence(words))
+            result['structure'] = structure
+        
+        return result, any(word['conf'] is not None for word in words)
+    
+    def _needs_escalation(self, result: Dict) -> bool:
+        """
+        Whether a tier's result is missing a required field or is unsure of it
+        
+        Args:
+            result (Dict): Result with 'fieldConfidence'
+            
+        Returns:
+            bool: True if a more thorough tier should run
+        """
+        for field in self.escalate_fields:
+            confidence = result['fieldConfidence'].get(field)
+            if confidence is None or confidence < self.escalate_confidence:
+                return True
+        return False
+    
+    def _extract_text_from_image(self, image_source: Union[str, bytes, np.ndarray],
+                                 tier: Optional[Dict] = None,
+                                 timings: Optional[StageTimings] = None) -> Tuple[str, List[Dict]]:
         """
         Extract text from image using OCR
         
         Args:
-            image_path (str): Path to the image file
+            image_source (Union[str, bytes, np.ndarray]): Path to the image
+                file, its encoded contents, or a decoded image
+            tier (Dict): OCR tier settings, defaults to the full tier
+            timings (StageTimings): Receives per-stage wall time
             
         Returns:
-            str: Extracted text
+            Tuple[str, List[Dict]]: Extracted text and its layout lines
         """
         try:
+            tier = tier or self.ocr_tiers['full']
+            
             # Load and preprocess image
-            image = cv2.imread(image_path)
+            with timed(timings, 'decode'):
+                image = self._load_image(image_source)
             if image is None:
                 raise ValueError("Could not load image")
             
             # Preprocess image for better OCR results
-            processed_image = self._preprocess_image(image)
+            processed_image = self._preprocess_image(image, tier['pipeline'], timings, tier['settings'])
             
             # Convert to PIL Image for tesseract
             pil_image = Image.fromarray(processed_image)
             
-            # Extract text using tesseract
-            custom_config = r'--oem 3 --psm 6 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz.,:;!?@#$%^&*()_+-=[]{}|\\;\':",./<>?~ '
-            text = pytesseract.image_to_string(pil_image, config=custom_config)
+            # Extract words and their layout using tesseract
+            lines = build_lines(self._run_tesseract(pil_image, tier['profiles']['image'], timings))
             
-            return text.strip()
+            return lines_to_text(lines), lines
             
         except Exception as e:
             logger.error(f"Error extracting text from image: {str(e)}")
             raise
     
-    def _extract_text_from_pdf(self, pdf_path: str) -> str:
+    def _load_image(self, image_source: Union[str, bytes, np.ndarray]) -> Optional[np.ndarray]:
+        """
+        Decode an image from a path, encoded bytes or an array
+        
+        Args:
+            image_source (Union[str, bytes, np.ndarray]): Image to load
+            
+        Returns:
+            Optional[np.ndarray]: BGR image, or None if it cannot be decoded
+        """
+        if isinstance(image_source, np.ndarray):
+            return image_source
+        if isinstance(image_source, str):
+            return cv2.imread(image_source)
+        
+        # Decode straight from memory, no temporary file
+        buffer = np.frombuffer(image_source, dtype=np.uint8)
+        return cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+    
+    def _extract_text_from_pdf(self, pdf_source: Union[str, bytes], tier: Optional[Dict] = None,
+                               timings: Optional[StageTimings] = None) -> Tuple[str, List[Dict]]:
         """
         Extract text from PDF file
         
+        Pages with a usable embedded text layer are read directly; only the
+        remaining (scanned) pages are rasterized, a small window at a time,
+        and released once OCR'd, so peak memory does not grow with the
+        page count.
+        
         Args:
-            pdf_path (str): Path to the PDF file
+            pdf_source (Union[str, bytes]): Path to the PDF file or its contents
+            tier (Dict): OCR tier settings, defaults to the full tier
+            timings (StageTimings): Receives per-stage wall time
             
         Returns:
-            str: Extracted text
+            Tuple[str, List[Dict]]: Extracted text and its layout lines
         """
+        if not isinstance(pdf_source, str):
+            with self._pdf_path(pdf_source) as pdf_path:
+                return self._extract_text_from_pdf(pdf_path, tier, timings)
+        
         try:
-            # Convert PDF pages to images
-            images = convert_from_path(pdf_path, dpi=300)
+            tier = tier or self.ocr_tiers['full']
             
-            extracted_text = ""
+            with timed(timings, 'decode'):
+                pdf_info = pdfinfo_from_path(pdf_source, poppler_path=self.poppler_path)
+            page_count = pdf_info['Pages']
             
-            for i, image in enumerate(images):
-                # Convert PIL image to numpy array for preprocessing
-                img_array = np.array(image)
-                
-                # Preprocess image
-                processed_image = self._preprocess_image(img_array)
-                
-                # Convert back to PIL Image
-                pil_image = Image.fromarray(processed_image)
-                
-                # Extract text
-                custom_config = r'--oem 3 --psm 6'
-                page_text = pytesseract.image_to_string(pil_image, config=custom_config)
-                
-                extracted_text += f"\n--- Page {i+1} ---\n{page_text}"
+            # Digital PDFs: take the embedded text and OCR only pages that lack it
+            with timed(timings, 'textLayer'):
+                page_texts = self._extract_pdf_text_layer(pdf_source, page_count)
+            ocr_pages = [
+                page_number for page_number in range(1, page_count + 1)
+                if self._pdf_page_needs_ocr(page_texts[page_number - 1])
+            ]
             
-            return extracted_text.strip()
+            # OCR pages concurrently when enabled, keeping page order;
+            # each task renders its own page so at most one page per worker is held
+            if self.pdf_page_workers > 1 and len(ocr_pages) > 1:
+                ocr_lines = self._get_page_executor().map(
+                    lambda page_number: self._extract_text_from_pdf_page_number(
+                        pdf_source, page_number, tier, timings),
+                    ocr_pages
+                )
+            else:
+                ocr_lines = (
+                    self._extract_text_from_pdf_page(image, tier, timings, page_number)
+                    for page_number, image in zip(
+                        ocr_pages, self._iter_pdf_pages(pdf_source, ocr_pages, timings, tier['pdfDpi']))
+                )
+            
+            # Text layer pages keep their line order but have no word boxes
+            page_lines = [lines_from_text(page_text, i + 1) for i, page_text in enumerate(page_texts)]
+            for page_number, lines in zip(ocr_pages, ocr_lines):
+                page_lines[page_number - 1] = lines
+            
+            lines = [line for lines in page_lines for line in lines]
+            return lines_to_text(lines, page_count), lines
             
         except Exception as e:
             logger.error(f"Error extracting text from PDF: {str(e)}")
             raise
     
-    def _preprocess_image(self, image: np.ndarray) -> np.ndarray:
+    @contextmanager
+    def _pdf_path(self, pdf_source: Union[str, bytes]):
         """
-        Preprocess image to improve OCR accuracy
+        Path of a PDF for poppler, writing in-memory contents to a temp file
+        
+        pdfinfo and pdftoppm need a file; spooling once here replaces the
+        temp file pdf2image would write on every page render.
         
         Args:
-            image (np.ndarray): Input image
+            pdf_source (Union[str, bytes]): Path to the PDF file or its contents
+            
+        Yields:
+            str: Path to the PDF, removed on exit if it was spooled
+        """
+        if isinstance(pdf_source, str):
+            yield pdf_source
+            return
+        
+        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as temp_file:
+            temp_file.write(pdf_source)
+            temp_filepath = temp_file.name
+        try:
+            yield temp_filepath
+        finally:
+            if os.path.exists(temp_filepath):
+                os.unlink(temp_filepath)
+    
+    def _extract_pdf_text_layer(self, pdf_source: str, page_count: int) -> List[str]:
+        """
+        Read the embedded text of every PDF page with poppler's pdftotext
+        
+        Args:
+            pdf_source (str): Path to the PDF file (see _pdf_path)
+            page_count (int): Number of pages in the PDF
             
         Returns:
-            np.ndarray: Preprocessed image
+            List[str]: Text per page, empty strings when unavailable
         """
+        if not self.pdf_text_layer:
+            return [''] * page_count
+        
+        pdftotext = os.path.join(self.poppler_path, 'pdftotext') if self.poppler_path else 'pdftotext'
         try:
-            # Convert to grayscale if needed
-            if len(image.shape) == 3:
-                gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            else:
-                gray = image.copy()
+            completed = subprocess.run(
+                [pdftotext, '-layout', '-enc', 'UTF-8', pdf_source, '-'],
+                capture_output=True, timeout=30, check=True
+            )
+        except (OSError, subprocess.SubprocessError) as e:
+            logger.warning(f"Could not read PDF text layer, falling back to OCR: {str(e)}")
+            return [''] * page_count
+        
+        # pdftotext separates pages with form feeds
+        pages = completed.stdout.decode('utf-8', errors='replace').split('\f')
+        pages = [page.strip() for page in pages[:page_count]]
+        return pages + [''] * (page_count - len(pages))
+    
+    def _pdf_page_needs_ocr(self, page_text: str) -> bool:
+        """
+        Decide whether a page's embedded text is missing or looks like a scan
+        
+        Args:
+            page_text (str): Text read from the page's text layer
+            
+        Returns:
+            bool: True if the page should be rasterized and OCR'd
+        """
+        visible = re.sub(r'\s+', '', page_text)
+        if len(visible) < self.pdf_text_min_chars:
+            return True
+        
+        # Invisible OCR layers of poor scans are mostly symbols and noise
+        alphanumeric = sum(1 for char in visible if char.isalnum())
+        return alphanumeric / len(visible) < 0.5
+    
+    def _iter_pdf_pages(self, pdf_source: str, page_numbers: List[int],
+                        timings: Optional[StageTimings] = None, dpi: Optional[int] = None):
+        """
+        Rasterize PDF pages lazily, a window of consecutive pages at a time
+        
+        Args:
+            pdf_source (str): Path to the PDF file (see _pdf_path)
+            page_numbers (List[int]): Ascending 1-based page numbers to render
+            timings (StageTimings): Receives rasterization time
+            dpi (int): Render resolution, defaults to the configured DPI
             
-            # Apply denoising
-            denoised = cv2.medianBlur(gray, 5)
+        Yields:
+            Image.Image: Rendered page, closed once the consumer moves on
+        """
+        i = 0
+        while i < len(page_numbers):
+            # Grow the window over consecutive pages only
+            first_page = last_page = page_numbers[i]
+            i += 1
+            while (i < len(page_numbers) and page_numbers[i] == last_page + 1
+                   and last_page - first_page + 1 < self.pdf_raster_window):
+                last_page = page_numbers[i]
+                i += 1
             
-            # Apply adaptive thresholding
-            binary = cv2.adaptiveThreshold(
-                denoised, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2
-            )
+            with timed(timings, 'rasterize'):
+                images = self._rasterize_pdf(pdf_source, first_page, last_page, dpi)
             
-            # Apply morphological operations to clean up
-            kernel = np.ones((1, 1), np.uint8)
-            cleaned = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, kernel)
+            while images:
+                image = images.pop(0)
+                yield image
+                image.close()
+    
+    def _rasterize_pdf(self, pdf_source: str, first_page: int, last_page: int,
+                       dpi: Optional[int] = None) -> List[Image.Image]:
+        """
+        Render a range of PDF pages
+        
+        Args:
+            pdf_source (str): Path to the PDF file (see _pdf_path)
+            first_page (int): First 1-based page to render
+            last_page (int): Last 1-based page to render
+            dpi (int): Render resolution, defaults to the configured DPI
             
-            return cleaned
+        Returns:
+            List[Image.Image]: Rendered pages
+        """
+        dpi = dpi or self.pdf_dpi
+        return convert_from_path(
+            pdf_source, dpi=dpi, first_page=first_page, last_page=last_page,
+            poppler_path=self.poppler_path
+        )
+    
+    def _extract_text_from_pdf_page_number(self, pdf_source: str, page_number: int,
+                                           tier: Optional[Dict] = None,
+                                           timings: Optional[StageTimings] = None) -> List[Dict]:
+        """
+        Render a single PDF page and extract its text
+        
+        Args:
+            pdf_source (str): Path to the PDF file (see _pdf_path)
+            page_number (int): 1-based page number
+            tier (Dict): OCR tier settings, defaults to the full tier
+            timings (StageTimings): Receives per-stage wall time
+            
+        Returns:
+            List[Dict]: Layout lines of the page
+        """
+        tier = tier or self.ocr_tiers['full']
+        with timed(timings, 'rasterize'):
+            image = self._rasterize_pdf(pdf_source, page_number, page_number, tier['pdfDpi'])[0]
+        try:
+            return self._extract_text_from_pdf_page(image, tier, timings, page_number)
+        finally:
+            image.close()
+    
+    def _extract_text_from_pdf_page(self, image: Image.Image, tier: Optional[Dict] = None,
+                                    timings: Optional[StageTimings] = None, page_number: int = 1) -> List[Dict]:
+        """
+        Extract text from a single rasterized PDF page
+        
+        Args:
+            image (Image.Image): Rendered page
+            tier (Dict): OCR tier settings, defaults to the full tier
+            timings (StageTimings): Receives per-stage wall time
+            page_number (int): 1-based page number recorded on the lines
+            
+        Returns:
+            List[Dict]: Layout lines of the page
+        """
+        # Convert PIL image to numpy array for preprocessing
+        img_array = np.array(image)
+        
+        # Preprocess image
+        tier = tier or self.ocr_tiers['full']
+        processed_image = self._preprocess_image(img_array, tier['pipeline'], timings, tier['settings'])
+        
+        # Convert back to PIL Image
+        pil_image = Image.fromarray(processed_image)
+        
+        # Extract words and their layout
+        return build_lines(self._run_tesseract(pil_image, tier['profiles']['pdf'], timings, page_number))
+    
+    def _get_page_executor(self) -> ThreadPoolExecutor:
+        """Get the long-lived thread pool used for page-parallel PDF OCR"""
+        with self._page_executor_lock:
+            if self._page_executor is None:
+                self._page_executor = ThreadPoolExecutor(
+                    max_workers=self.pdf_page_workers, thread_name_prefix='ocr-page'
+                )
+            return self._page_executor
+    
+    def _run_tesseract(self, pil_image: Image.Image, profile: Dict,
+                       timings: Optional[StageTimings] = None, page_number: int = 1) -> List[Dict]:
+        """
+        Run Tesseract on a prepared image
+        
+        A single recognition pass returns words with their boxes and
+        confidences, so text and layout come from the same call. Uses a
+        persistent tesserocr API handle when available so the language
+        model is loaded once per worker instead of once per call.
+        
+        Args:
+            pil_image (Image.Image): Image to recognize
+            profile (Dict): Tesseract settings (oem, psm, variables)
+            timings (StageTimings): Receives recognition time
+            page_number (int): Page number recorded on the words
+            
+        Returns:
+            List[Dict]: Recognized words (see receipt_layout.words_from_data)
+        """
+        with timed(timings, 'tesseract'):
+            if self.use_persistent_api:
+                api = self._get_tesseract_api(profile)
+                api.SetImage(pil_image)
+                try:
+                    data = parse_tsv(api.GetTSVText(0))
+                finally:
+                    api.Clear()
+            else:
+                data = pytesseract.image_to_data(
+                    pil_image, lang=self.ocr_lang, config=self._build_tesseract_config(profile),
+                    output_type=pytesseract.Output.DICT
+                )
+        
+        return words_from_data(data, page_number)
+    
+    def _build_tesseract_config(self, profile: Dict) -> str:
+        """Build a pytesseract config string from a profile"""
+        config = f"--oem {profile['oem']} --psm {profile['psm']}"
+        for name, value in profile.get('variables', {}).items():
+            config += f" -c {shlex.quote(f'{name}={value}')}"
+        return config
+    
+    def _get_tesseract_api(self, profile: Dict):
+        """
+        Get (or create) this thread's persistent tesserocr API for a profile
+        
+        Args:
+            profile (Dict): Tesseract settings (oem, psm, variables)
+            
+        Returns:
+            tesserocr.PyTessBaseAPI: Initialized API handle
+        """
+        apis = getattr(self._local, 'apis', None)
+        if apis is None:
+            apis = self._local.apis = {}
+        
+        key = (profile['oem'], profile['psm'], tuple(sorted(profile.get('variables', {}).items())))
+        api = apis.get(key)
+        if api is None:
+            api = tesserocr.PyTessBaseAPI(lang=self.ocr_lang, psm=profile['psm'], oem=profile['oem'])
+            for name, value in profile.get('variables', {}).items():
+                api.SetVariable(name, value)
+            apis[key] = api
+        return api
+    
+    def warm_up(self):
+        """Load Tesseract models ahead of the first request"""
+        if not self.use_persistent_api:
+            return
+        
+        blank = Image.new('L', (64, 32), color=255)
+        for name in self.ocr_tier_order:
+            for profile in self.ocr_tiers[name]['profiles'].values():
+                self._run_tesseract(blank, profile)
+    
+    def _preprocess_image(self, image: np.ndarray, pipeline: Optional[PreprocessingPipeline] = None,
+                          timings: Optional[StageTimings] = None, settings: Optional[Dict] = None) -> np.ndarray:
+        """
+        Preprocess image to improve OCR accuracy
+        
+        Args:
+            image (np.ndarray): Input image
+            pipeline (PreprocessingPipeline): Stages to apply, defaults to
+                the configured pipeline
+            timings (StageTimings): Receives per-stage wall time
+            settings (Dict): Stage parameters, defaults to the configured ones
+            
+        Returns:
+            np.ndarray: Preprocessed image
+        """
+        try:
+            return (pipeline or self.preprocess_pipeline).run(image, settings or self.preprocess_settings, timings)
             
         except Exception as e:
             logger.error(f"Error preprocessing image: {str(e)}")
             return image
     
-    def extract_from_text(self, text: str) -> Dict:
+    def extract_from_text(self, text: str, date_order: Optional[str] = None,
+                          words: Optional[List[Dict]] = None) -> Dict:
         """
         Extract structured information from text
         
         Args:
             text (str): Raw text to process
+            date_order (str): 'MDY' or 'DMY' reading of ambiguous dates,
+                defaults to the configured order
+            words (List[Dict]): OCR words with 'start'/'end' offsets into text
+                and Tesseract 'conf'; fields are then scored by the
+                confidence of the words they were read from
             
         Returns:
             Dict: Extracted structured information
@@ -212,34 +798,160 @@ class OCRProcessor:
             cleaned_text = self._clean_text(text)
             
             # Extract different components
-            amount = self._extract_amount(cleaned_text)
-            date = self._extract_date(cleaned_text)
-            merchant = self._extract_merchant_name(cleaned_text)
+            found_amount = self._find_amount(cleaned_text)
+            found_date = self._find_date(cleaned_text, date_order)
+            merchant = self._extract_merchant_name(self._clean_lines(text))
+            
+            # Cleaning keeps offsets for OCR text (single separators, no
+            # padding), so spans map straight back onto the words
+            field_confidence = {'amount': None, 'date': None, 'merchant': None}
+            if found_amount:
+                field_confidence['amount'] = self._span_confidence(words, *found_amount[1])
+            if found_date:
+                field_confidence['date'] = self._span_confidence(words, *found_date[1])
+            if merchant:
+                start = cleaned_text.find(merchant)
+                # A merchant line not found verbatim falls back to the whole text's confidence
+                field_confidence['merchant'] = (self._span_confidence(words, start, start + len(merchant))
+                                                if start >= 0 else self._words_confidence(words) or 1.0)
             
             # Calculate confidence score
-            confidence = self._calculate_confidence(amount, date, merchant, cleaned_text)
+            confidence = self._calculate_confidence(field_confidence, cleaned_text, self._words_confidence(words))
             
             return {
-                'extractedAmount': amount,
-                'extractedDate': date,
+                'extractedAmount': found_amount[0] if found_amount else None,
+                'extractedDate': found_date[0] if found_date else None,
                 'extractedMerchant': merchant,
-                'confidence': confidence
+                'confidence': confidence,
+                'fieldConfidence': field_confidence
             }
             
         except Exception as e:
             logger.error(f"Error extracting from text: {str(e)}")
             raise
     
+    def extract_from_texts(self, texts: List[str], date_order: Optional[str] = None) -> List[Dict]:
+        """
+        Extract structured information from many texts, such as statement lines
+        
+        Rows are joined into one buffer separated by NUL characters, which no
+        pattern can match across, so cleaning, the amount scan and each date
+        pattern run once per batch; matches are mapped back to their row.
+        
+        Args:
+            texts (List[str]): Raw texts, one result per entry
+            date_order (str): 'MDY' or 'DMY' reading of ambiguous dates,
+                defaults to the configured order
+            
+        Returns:
+            List[Dict]: Extracted information per text, in input order
+        """
+        try:
+            if not texts:
+                return []
+            
+            cleaned_rows = self._clean_texts(texts)
+            buffer, row_starts = self._join_rows(cleaned_rows)
+            
+            # Largest reasonable amount per row
+            amounts = [None] * len(cleaned_rows)
+            for position, amount_str in self._amount_candidates(buffer):
+                amount = self._parse_amount(amount_str)
+                if amount is not None:
+                    row = bisect_right(row_starts, position) - 1
+                    if amounts[row] is None or amount > amounts[row]:
+                        amounts[row] = amount
+            
+            # First parseable date per row, earlier patterns first; each
+            # pattern only scans the rows still without a date
+            dates = [None] * len(cleaned_rows)
+            pending = list(range(len(cleaned_rows)))
+            for regex in self._date_regexes:
+                pending_buffer, pending_starts = self._join_rows([cleaned_rows[row] for row in pending])
+                
+                for match in regex.finditer(pending_buffer):
+                    row = pending[bisect_right(pending_starts, match.start()) - 1]
+                    if dates[row] is None:
+                        dates[row] = self._parse_date(match.group(1), date_order)
+                
+                pending = [row for row in pending if dates[row] is None]
+                if not pending:
+                    break
+            
+            results = []
+            for row, cleaned_text in enumerate(cleaned_rows):
+                merchant = self._extract_merchant_name(self._clean_lines(texts[row]))
+                field_confidence = {
+                    'amount': None if amounts[row] is None else 1.0,
+                    'date': None if dates[row] is None else 1.0,
+                    'merchant': None if merchant is None else 1.0
+                }
+                results.append({
+                    'extractedAmount': amounts[row],
+                    'extractedDate': dates[row],
+                    'extractedMerchant': merchant,
+                    'confidence': self._calculate_confidence(field_confidence, cleaned_text),
+                    'fieldConfidence': field_confidence
+                })
+            
+            return results
+            
+        except Exception as e:
+            logger.error(f"Error extracting from texts: {str(e)}")
+            raise
+    
+    @staticmethod
+    def _join_rows(rows: List[str]) -> Tuple[str, List[int]]:
+        """
+        Join rows into one buffer
+        
+        Args:
+            rows (List[str]): Cleaned rows
+            
+        Returns:
+            Tuple[str, List[int]]: Buffer and the offset each row starts at
+        """
+        row_starts, position = [], 0
+        for row in rows:
+            row_starts.append(position)
+            position += len(row) + len(ROW_SEPARATOR)
+        return ROW_SEPARATOR.join(rows), row_starts
+    
+    def _clean_texts(self, texts: List[str]) -> List[str]:
+        """
+        Clean many texts with one pass per cleanup pattern
+        
+        Args:
+            texts (List[str]): Raw texts
+            
+        Returns:
+            List[str]: Texts cleaned exactly as _clean_text would
+        """
+        # A separator inside a text must still end up as a space, like any
+        # other special character, so swap it for one first
+        buffer = ROW_SEPARATOR.join(text.replace(ROW_SEPARATOR, '\x01') for text in texts)
+        buffer = self._whitespace_regex.sub(' ', buffer)
+        
+        # Per-row strip: after collapsing, edges hold at most one space
+        buffer = self._row_edge_regex.sub(ROW_SEPARATOR, buffer).strip(' ')
+        
+        buffer = self._batch_special_chars_regex.sub(' ', buffer)
+        return buffer.split(ROW_SEPARATOR)
+    
     def _clean_text(self, text: str) -> str:
         """Clean and normalize text"""
         # Remove extra whitespace and normalize
-        cleaned = re.sub(r'\s+', ' ', text.strip())
+        cleaned = self._whitespace_regex.sub(' ', text.strip())
         
         # Remove special characters that might interfere with parsing
-        cleaned = re.sub(r'[^\w\s\$\.\,\:\;\-\/\(\)]', ' ', cleaned)
+        cleaned = self._special_chars_regex.sub(' ', cleaned)
         
         return cleaned
     
+    def _clean_lines(self, text: str) -> str:
+        """Clean text line by line, keeping the line breaks merchant detection looks at"""
+        return '\n'.join(line for line in (self._clean_text(line) for line in text.split('\n')) if line)
+    
     def _extract_amount(self, text: str) -> Optional[float]:
         """
         Extract monetary amount from text
@@ -250,93 +962,284 @@ class OCRProcessor:
         Returns:
             Optional[float]: Extracted amount or None
         """
-        amounts = []
+        found = self._find_amount(text)
+        return found[0] if found else None
+    
+    def _find_amount(self, text: str) -> Optional[Tuple[float, Tuple[int, int]]]:
+        """
+        Find the extracted amount and where its number is in the text
         
-        for pattern in self.currency_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                try:
-                    # Get the numeric part
-                    amount_str = match.group(1) if match.groups() else match.group(0)
-                    amount_str = re.sub(r'[^\d\.]', '', amount_str)
+        Args:
+            text (str): Cleaned text
+            
+        Returns:
+            Optional[Tuple[float, Tuple[int, int]]]: Amount and (start, end) span
+        """
+        best = None
+        
+        for start, amount_str in self._amount_candidates(text):
+            amount = self._parse_amount(amount_str)
+            # Keep the largest reasonable amount (likely the total)
+            if amount is not None and (best is None or amount > best[0]):
+                best = (amount, (start, start + len(amount_str)))
+        
+        return best
+    
+    def _amount_candidates(self, text: str) -> List[Tuple[int, str]]:
+        """
+        Collect every currency pattern match with its position
+        
+        Args:
+            text (str): Cleaned text
+            
+        Returns:
+            List[Tuple[int, str]]: (start of the number, matched numeric text),
+                in no particular order
+        """
+        if self.single_pass_extraction:
+            return self._scan_amounts(text)
+        
+        return [
+            (match.start(1), match.group(1)) for regex in self._currency_regexes for match in regex.finditer(text)
+        ]
+    
+    def _scan_amounts(self, text: str) -> List[Tuple[int, str]]:
+        """
+        Collect the amounts every currency pattern matches in one scan
+        
+        Gives the same matches as running each pattern's finditer, found
+        from the markers instead of rescanning the text per pattern.
+        
+        Args:
+            text (str): Cleaned text
+            
+        Returns:
+            List[Tuple[int, str]]: (start of the number, matched numeric text)
+        """
+        candidates = []
+        suffix_resume = {}
+        
+        # Step one character past each marker since AMOUNT and TOTAL can overlap
+        marker = self._amount_scanner.search(text)
+        while marker:
+            prefix_index, suffix_index = self._amount_markers[marker.lastgroup]
+            
+            match = self._currency_regexes[prefix_index].match(text, marker.start())
+            if match:
+                candidates.append((match.start(1), match.group(1)))
+            
+            if suffix_index is not None:
+                number = self._amount_before(text, marker.start(), suffix_resume.get(suffix_index, 0))
+                if number:
+                    candidates.append(number)
+                    suffix_resume[suffix_index] = marker.end()
+            
+            marker = self._amount_scanner.search(text, marker.start() + 1)
+        
+        return candidates
+    
+    def _amount_before(self, text: str, marker_start: int, resume: int) -> Optional[Tuple[int, str]]:
+        """
+        Find the number a suffix pattern matches right before a marker
+        
+        Args:
+            text (str): Cleaned text
+            marker_start (int): Position of the marker
+            resume (int): End of the same pattern's previous match
+            
+        Returns:
+            Optional[Tuple[int, str]]: Start and text of the leftmost matching number
+        """
+        end = marker_start
+        while end > resume and text[end - 1].isspace():
+            end -= 1
+        
+        start = end
+        while start > resume and (text[start - 1].isdecimal() or text[start - 1] == '.'):
+            start -= 1
+        
+        for position in range(start, end):
+            match = self._number_regex.fullmatch(text, position, end)
+            if match:
+                return position, match.group(0)
+        
+        return None
+    
+    def _parse_amount(self, amount_str: str) -> Optional[float]:
+        """
+        Convert a matched amount to a float if it is a plausible receipt amount
+        
+        Args:
+            amount_str (str): Matched numeric text
+            
+        Returns:
+            Optional[float]: Amount or None
+        """
+        try:
+            amount_str = self._non_numeric_regex.sub('', amount_str)
+            
+            if amount_str and '.' in amount_str:
+                amount = float(amount_str)
+                if 0.01 <= amount <= 10000:  # Reasonable range for receipt amounts
+                    return amount
+            elif amount_str:
+                amount = float(amount_str)
+                if amount >= 1:  # Assume amounts without decimals are in dollars
+                    return amount
+                elif amount >= 0.01:  # Small amounts might be valid
+                    return amount
                     
-                    if amount_str and '.' in amount_str:
-                        amount = float(amount_str)
-                        if 0.01 <= amount <= 10000:  # Reasonable range for receipt amounts
-                            amounts.append(amount)
-                    elif amount_str:
-                        amount = float(amount_str)
-                        if amount >= 1:  # Assume amounts without decimals are in dollars
-                            amounts.append(amount)
-                        elif amount >= 0.01:  # Small amounts might be valid
-                            amounts.append(amount)
-                            
-                except (ValueError, IndexError):
-                    continue
-        
-        if amounts:
-            # Return the largest reasonable amount (likely the total)
-            return max(amounts)
+        except ValueError:
+            pass
         
         return None
     
-    def _extract_date(self, text: str) -> Optional[str]:
+    def _extract_date(self, text: str, date_order: Optional[str] = None) -> Optional[str]:
         """
         Extract date from text
         
         Args:
             text (str): Text to search
+            date_order (str): Preferred order for ambiguous numeric dates
             
         Returns:
             Optional[str]: Extracted date in ISO format or None
         """
-        for pattern in self.date_patterns:
-            matches = re.finditer(pattern, text, re.IGNORECASE)
-            for match in matches:
-                date_str = match.group(1)
-                parsed_date = self._parse_date(date_str)
+        found = self._find_date(text, date_order)
+        return found[0] if found else None
+    
+    def _find_date(self, text: str, date_order: Optional[str] = None) -> Optional[Tuple[str, Tuple[int, int]]]:
+        """
+        Find the extracted date and where it is in the text
+        
+        Args:
+            text (str): Cleaned text
+            date_order (str): Preferred order for ambiguous numeric dates
+            
+        Returns:
+            Optional[Tuple[str, Tuple[int, int]]]: ISO date and (start, end) span
+        """
+        # Earlier patterns take priority, so scanning stops at the first
+        # parseable date rather than collecting every candidate
+        for regex in self._date_regexes:
+            for match in regex.finditer(text):
+                parsed_date = self._parse_date(match.group(1), date_order)
                 if parsed_date:
-                    return parsed_date
+                    return parsed_date, match.span(1)
         
         return None
     
-    def _parse_date(self, date_str: str) -> Optional[str]:
+    @staticmethod
+    def _validate_date_order(date_order: str) -> str:
+        """
+        Normalize a date order hint
+        
+        Args:
+            date_order (str): 'MDY' or 'DMY', case-insensitive
+            
+        Returns:
+            str: Upper-case date order
+            
+        Raises:
+            ValueError: If the order is not supported
+        """
+        normalized = date_order.strip().upper()
+        if normalized not in DATE_ORDERS:
+            raise ValueError(f"Unsupported date order: {date_order}. Available: {', '.join(DATE_ORDERS)}")
+        return normalized
+    
+    def _parse_date(self, date_str: str, date_order: Optional[str] = None) -> Optional[str]:
         """
         Parse various date formats to ISO format
         
         Args:
             date_str (str): Date string to parse
+            date_order (str): Preferred order for ambiguous numeric dates,
+                defaults to the configured order
             
         Returns:
             Optional[str]: ISO formatted date or None
         """
-        # Common date formats to try
-        date_formats = [
-            '%m/%d/%Y', '%m-%d-%Y', '%m.%d.%Y',
-            '%m/%d/%y', '%m-%d-%y', '%m.%d.%y',
-            '%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y',
-            '%d/%m/%y', '%d-%m-%y', '%d.%m.%y',
-            '%Y/%m/%d', '%Y-%m-%d', '%Y.%m.%d',
-            '%B %d, %Y', '%b %d, %Y',
-            '%d %B %Y', '%d %b %Y'
-        ]
+        return self._parse_date_cached(date_str, date_order or self.date_order)
+    
+    def _parse_date_uncached(self, date_str: str, date_order: str) -> Optional[str]:
+        """
+        Read a date from its token shape
         
-        for fmt in date_formats:
-            try:
-                parsed = datetime.strptime(date_str, fmt)
-                # Convert 2-digit years
-                if parsed.year < 50:
-                    parsed = parsed.replace(year=parsed.year + 2000)
-                elif parsed.year < 100:
-                    parsed = parsed.replace(year=parsed.year + 1900)
-                
-                # Return ISO format date
-                return parsed.strftime('%Y-%m-%d')
-            except ValueError:
-                continue
+        Numeric dates are year-first when they start with four digits and
+        otherwise read in the preferred day/month order, falling back to the
+        other order only when the preferred one is not a valid date. Month
+        names may come before or after the day and need a four-digit year,
+        so text like '5 March 12, 2024' is not read as 2012.
+        
+        Args:
+            date_str (str): Date string to parse
+            date_order (str): 'MDY' or 'DMY'
+            
+        Returns:
+            Optional[str]: ISO formatted date or None
+        """
+        date_str = date_str.strip()
+        
+        match = self._numeric_date_regex.match(date_str)
+        if match:
+            first, _, second, last = match.groups()
+            if len(first) == 4:
+                if len(last) > 2:
+                    return None
+                return self._build_date(first, second, last)
+            
+            if len(first) > 2 or len(last) not in (2, 4):
+                return None
+            
+            month, day = (first, second) if date_order == 'MDY' else (second, first)
+            return self._build_date(last, month, day) or self._build_date(last, day, month)
+        
+        match = self._day_first_date_regex.match(date_str)
+        if match:
+            day, month_name, year = match.groups()
+            return self._build_date(year, MONTHS.get(month_name.lower()), day)
+        
+        match = self._month_first_date_regex.match(date_str)
+        if match:
+            month_name, day, year = match.groups()
+            return self._build_date(year, MONTHS.get(month_name.lower()), day)
         
         return None
     
+    @staticmethod
+    def _build_date(year: str, month: Union[str, int, None], day: str) -> Optional[str]:
+        """
+        Validate date parts and format them as an ISO date
+        
+        Args:
+            year (str): Two or four digit year
+            month (Union[str, int, None]): Month number, None if unrecognized
+            day (str): Day of the month
+            
+        Returns:
+            Optional[str]: ISO formatted date or None
+        """
+        if month is None or len(year) not in (2, 4):
+            return None
+        
+        year_number, month_number, day_number = int(year), int(month), int(day)
+        
+        # Two-digit years follow strptime's %y pivot (69-99 -> 1900s)
+        if len(year) == 2:
+            year_number += 1900 if year_number >= 69 else 2000
+        elif year_number < 50:
+            year_number += 2000
+        elif year_number < 100:
+            year_number += 1900
+        
+        if year_number < 1 or not 1 <= month_number <= 12:
+            return None
+        if not 1 <= day_number <= calendar.monthrange(year_number, month_number)[1]:
+            return None
+        
+        return f"{year_number:04d}-{month_number:02d}-{day_number:02d}"
+    
     def _extract_merchant_name(self, text: str) -> Optional[str]:
         """
         Extract merchant/store name from text
@@ -352,55 +1255,78 @@ class OCRProcessor:
         # Look for merchant name in first few lines
         for i, line in enumerate(lines[:5]):
             line = line.strip()
-            if len(line) > 3 and not re.match(r'^\d+[\d\s\-\(\)]*$', line):
+            if len(line) > 3 and not self._numeric_line_regex.match(line):
                 # Skip lines that are just numbers (like phone numbers)
-                if not re.search(r'^\d{10,}$', line.replace(' ', '').replace('-', '').replace('(', '').replace(')', '')):
+                if not self._phone_number_regex.search(line.replace(' ', '').replace('-', '').replace('(', '').replace(')', '')):
                     # Check if line contains merchant indicators or is likely a business name
-                    if (any(indicator in line.lower() for indicator in self.merchant_indicators) or
-                        re.search(r'\b[A-Z][A-Za-z\s&]+\b', line)):
+                    if (self._merchant_indicator_regex.search(line.lower()) or
+                        self._business_name_regex.search(line)):
                         return line[:50]  # Limit length
         
         # Fallback: look for capitalized words that might be business names
-        capitalized_words = re.findall(r'\b[A-Z][A-Za-z]+(?:\s+[A-Z][A-Za-z]+)*\b', text)
+        capitalized_words = self._capitalized_words_regex.findall(text)
         for word_group in capitalized_words:
             if len(word_group) > 3 and len(word_group) < 50:
                 return word_group
         
         return None
     
-    def _calculate_confidence(self, amount: Optional[float], date: Optional[str], 
-                            merchant: Optional[str], text: str) -> float:
+    def _span_confidence(self, words: Optional[List[Dict]], start: int, end: int) -> float:
         """
-        Calculate confidence score based on extracted information
+        Confidence of the OCR words overlapping a span of the text
         
         Args:
-            amount: Extracted amount
-            date: Extracted date
-            merchant: Extracted merchant name
-            text: Original text
+            words (List[Dict]): OCR words with 'start'/'end' offsets, or None
+                for text that did not come from OCR
+            start (int): Span start
+            end (int): Span end
             
         Returns:
-            float: Confidence score between 0 and 1
+            float: Mean word confidence on a 0-1 scale; 1.0 without OCR
+                confidences (plain text or a PDF text layer)
         """
-        confidence = 0.0
+        if not words:
+            return 1.0
         
-        # Amount extraction confidence
-        if amount is not None:
-            confidence += 0.4
+        confs = [
+            word['conf'] for word in words
+            if word['conf'] is not None and word['start'] < end and word['end'] > start
+        ]
+        return round(sum(confs) / len(confs) / 100, 3) if confs else 1.0
+    
+    def _words_confidence(self, words: Optional[List[Dict]]) -> Optional[float]:
+        """Mean confidence of all OCR words on a 0-1 scale, None if unknown"""
+        confs = [word['conf'] for word in words or [] if word['conf'] is not None]
+        return round(sum(confs) / len(confs) / 100, 3) if confs else None
+    
+    def _calculate_confidence(self, field_confidence: Dict[str, Optional[float]], text: str,
+                              text_confidence: Optional[float] = None) -> float:
+        """
+        Calculate confidence score from per-field confidences
         
-        # Date extraction confidence
-        if date is not None:
-            confidence += 0.3
+        Fields keep their weights (amount 0.4, date 0.3, merchant 0.2, text
+        quality 0.1) but each is scaled by how confidently its words were
+        recognized, so a receipt read with low Tesseract confidence scores
+        low even when every field was found.
         
-        # Merchant extraction confidence
-        if merchant is not None:
-            confidence += 0.2
+        Args:
+            field_confidence (Dict[str, Optional[float]]): 0-1 confidence per
+                field ('amount', 'date', 'merchant'), None when not found
+            text (str): Cleaned text
+            text_confidence (float): Mean confidence of all OCR words, None
+                when the text did not come from OCR
+            
+        Returns:
+            float: Confidence score between 0 and 1
+        """
+        weights = {'amount': 0.4, 'date': 0.3, 'merchant': 0.2}
+        confidence = sum(weight * (field_confidence.get(field) or 0.0) for field, weight in weights.items())
         
         # Text quality confidence
         if len(text.strip()) > 20:
-            confidence += 0.1
+            confidence += 0.1 * (1.0 if text_confidence is None else text_confidence)
         
-        return min(confidence, 1.0)
+        return round(min(confidence, 1.0), 3)
     
     def test_ocr_engine(self) -> Dict:
         """
@@ -0,0 +1,163 @@
+"""
+Pagination Module
+Opaque keyset cursors for paging through sorted MongoDB queries
+"""
+
+import base64
+import binascii
+from typing import Any, Dict, List, Optional, Tuple
+from bson import json_util
+
+
+class InvalidCursorError(ValueError):
+    """Raised when an 'after' cursor cannot be decoded or does not match the query"""
+
+
+def encode_cursor(document: Dict, sort_field: str, sort_order: int) -> str:
+    """
+    Build the cursor pointing just past a document
+
+    Args:
+        document (Dict): Last document of the current page
+        sort_field (str): Field the query is sorted by
+        sort_order (int): 1 for ascending, -1 for descending
+
+    Returns:
+        str: URL-safe opaque cursor
+    """
+    payload = {
+        'field': sort_field,
+        'order': sort_order,
+        # Extended JSON keeps ObjectId and datetime types across the round trip
+        'value': document.get(sort_field),
+        'id': document['_id'],
+    }
+    return base64.urlsafe_b64encode(json_util.dumps(payload).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, sort_field: str, sort_order: int) -> Tuple[Any, Any]:
+    """
+    Read the position stored in a cursor
+
+    Args:
+        cursor (str): Cursor from encode_cursor
+        sort_field (str): Field the query is sorted by
+        sort_order (int): 1 for ascending, -1 for descending
+
+    Returns:
+        Tuple[Any, Any]: Sort value and _id of the last document seen
+
+    Raises:
+        InvalidCursorError: If the cursor is malformed or was issued for another sort
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json_util.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+        field, order, value, document_id = payload['field'], payload['order'], payload['value'], payload['id']
+    except (binascii.Error, UnicodeError, ValueError, TypeError, KeyError) as e:
+        raise InvalidCursorError('Invalid pagination cursor') from e
+
+    if field != sort_field or order != sort_order:
+        raise InvalidCursorError('Pagination cursor was issued for a different sortBy or sortOrder')
+    return value, document_id
+
+
+def keyset_filter(sort_field: str, sort_order: int, value: Any, document_id: Any) -> Dict:
+    """
+    Filter matching the documents that sort after a position
+
+    Documents are ordered by (sort_field, _id) in the same direction, so
+    equal sort values are broken by _id and no document is skipped or repeated.
+    MongoDB sorts missing and null values before everything else.
+
+    Args:
+        sort_field (str): Field the query is sorted by
+        sort_order (int): 1 for ascending, -1 for descending
+        value (Any): Sort value of the last document seen
+        document_id (Any): _id of the last document seen
+
+    Returns:
+        Dict: Query filter to combine with the listing filters
+    """
+    beyond = '$gt' if sort_order == 1 else '$lt'
+    if sort_field == '_id':
+        return {'_id': {beyond: document_id}}
+    tie = {sort_field: value, '_id': {beyond: document_id}}
+
+    if value is None:
+        # Ascending: every non-null value follows null. Descending: only nulls remain.
+        if sort_order == 1:
+            return {'$or': [{sort_field: {'$ne': None}}, tie]}
+        return tie
+
+    alternatives: List[Dict] = [{sort_field: {beyond: value}}, tie]
+    if sort_order == -1:
+        alternatives.append({sort_field: None})
+    return {'$or': alternatives}
+
+
+def paginate(collection, query: Dict, sort_field: str, sort_order: int, limit: int,
+             after: Optional[str] = None, skip: int = 0) -> Tuple[List[Dict], Optional[str]]:
+    """
+    Fetch one page in (sort_field, _id) order
+
+    With a cursor the page starts right after it using the index, so the
+    cost does not grow with depth. Without one, skip is applied for
+    page-number compatibility.
+
+    Args:
+        collection: pymongo collection
+        query (Dict): Listing filters
+        sort_field (str): Field to sort by
+        sort_order (int): 1 for ascending, -1 for descending
+        limit (int): Page size
+        after (str): Cursor from a previous page's nextCursor
+        skip (int): Documents to skip when no cursor is given
+
+    Returns:
+        Tuple[List[Dict], Optional[str]]: Page documents and the cursor of the
+            next page, None on the last page
+
+    Raises:
+        InvalidCursorError: If the cursor is malformed or was issued for another sort
+    """
+    if after:
+        value, document_id = decode_cursor(after, sort_field, sort_order)
+        query = {'$and': [query, keyset_filter(sort_field, sort_order, value, document_id)]}
+        skip = 0
+
+    # One extra document tells whether another page exists
+    cursor = collection.find(query).sort([(sort_field, sort_order), ('_id', sort_order)])
+    if skip:
+        cursor = cursor.skip(skip)
+    documents = list(cursor.limit(limit + 1))
+
+    if len(documents) <= limit:
+        return documents, None
+    documents = documents[:limit]
+    return documents, encode_cursor(documents[-1], sort_field, sort_order)
+
+
+def paginate_by_text_score(collection, query: Dict, limit: int, skip: int = 0) -> Tuple[List[Dict], bool]:
+    """
+    Fetch one page of a $text query, best matches first
+
+    Relevance is not stored on documents, so ranked pages use skip
+    instead of a cursor.
+
+    Args:
+        collection: pymongo collection
+        query (Dict): Listing filters including a $text clause
+        limit (int): Page size
+        skip (int): Documents to skip
+
+    Returns:
+        Tuple[List[Dict], bool]: Page documents with their 'score', and
+            whether another page exists
+    """
+    cursor = collection.find(query, {'score': {'$meta': 'textScore'}}).sort(
+        [('score', {'$meta': 'textScore'}), ('_id', -1)])
+    if skip:
+        cursor = cursor.skip(skip)
+    documents = list(cursor.limit(limit + 1))
+    return documents[:limit], len(documents) > limit
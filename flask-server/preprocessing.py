@@ -0,0 +1,252 @@
+"""
+Image Preprocessing Module
+Composable, individually timed image stages applied before OCR
+"""
+
+import time
+import threading
+from typing import Callable, Dict, List, Optional
+import cv2
+import numpy as np
+
+# Stages run when nothing else is configured
+DEFAULT_STAGES = 'crop,resize,denoise,threshold'
+
+
+class StageTimings:
+    """Thread-safe accumulator of wall time per named stage"""
+
+    def __init__(self):
+        self._totals = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float):
+        """Add elapsed seconds to a stage"""
+        with self._lock:
+            self._totals[name] = self._totals.get(name, 0.0) + seconds
+
+    def as_dict(self) -> Dict[str, float]:
+        """Stage totals in milliseconds"""
+        with self._lock:
+            return {name: round(seconds * 1000, 3) for name, seconds in self._totals.items()}
+
+
+class _StageTimer:
+    """Times one block into a StageTimings"""
+
+    def __init__(self, timings: Optional[StageTimings], name: str):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.timings is not None:
+            self.timings.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def timed(timings: Optional[StageTimings], name: str) -> _StageTimer:
+    """Time a block into timings, a no-op accumulator when timings is None"""
+    return _StageTimer(timings, name)
+
+
+def _downscale(gray: np.ndarray, max_side: int):
+    """Downscaled working copy for analysis, with the scale factor used"""
+    height, width = gray.shape[:2]
+    factor = min(1.0, max_side / max(height, width))
+    if factor < 1.0:
+        return cv2.resize(gray, None, fx=factor, fy=factor, interpolation=cv2.INTER_AREA), factor
+    return gray, factor
+
+
+def crop(gray: np.ndarray, settings: Dict) -> np.ndarray:
+    """
+    Crop a photo to the bounding region of the receipt
+
+    The receipt is found as the largest bright contour on a downscaled
+    copy; frames where no clear region stands out are left untouched.
+    """
+    height, width = gray.shape[:2]
+    small, factor = _downscale(gray, 800)
+
+    # Paper is brighter than its background; close the text holes inside it
+    blurred = cv2.GaussianBlur(small, (5, 5), 0)
+    _, mask = cv2.threshold(blurred, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, np.ones((15, 15), np.uint8))
+
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contours:
+        return gray
+
+    x, y, w, h = cv2.boundingRect(max(contours, key=cv2.contourArea))
+    coverage = (w * h) / float(small.shape[0] * small.shape[1])
+    if coverage < 0.1 or coverage > 0.95:
+        return gray
+
+    # Map back to full resolution with a small margin
+    margin = int(10 / factor)
+    x0 = max(int(x / factor) - margin, 0)
+    y0 = max(int(y / factor) - margin, 0)
+    x1 = min(int((x + w) / factor) + margin, width)
+    y1 = min(int((y + h) / factor) + margin, height)
+    return gray[y0:y1, x0:x1]
+
+
+def estimate_text_height(gray: np.ndarray) -> Optional[float]:
+    """
+    Estimate the typical character height in pixels
+
+    Returns:
+        Optional[float]: Median glyph height, or None if too few glyphs
+    """
+    small, factor = _downscale(gray, 1000)
+
+    _, ink = cv2.threshold(small, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    count, _, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)
+
+    # Skip the background label and anything that is not glyph-sized
+    heights = stats[1:count, cv2.CC_STAT_HEIGHT]
+    widths = stats[1:count, cv2.CC_STAT_WIDTH]
+    glyphs = heights[(heights >= 3) & (heights < small.shape[0] * 0.2) & (widths < small.shape[1] * 0.5)]
+    if len(glyphs) < 10:
+        return None
+
+    return float(np.median(glyphs)) / factor
+
+
+def resize(gray: np.ndarray, settings: Dict) -> np.ndarray:
+    """Resize so text lands near the target height, within the size cap"""
+    height, width = gray.shape[:2]
+    text_height = estimate_text_height(gray)
+
+    scale = settings['targetTextHeight'] / text_height if text_height else 1.0
+    scale = min(max(scale, 0.25), 2.0, settings['maxImageSide'] / max(height, width))
+
+    # Ignore small adjustments that cost a full-image pass for no gain
+    if 0.9 <= scale <= 1.1:
+        return gray
+
+    interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_CUBIC
+    return cv2.resize(gray, None, fx=scale, fy=scale, interpolation=interpolation)
+
+
+def deskew(gray: np.ndarray, settings: Dict) -> np.ndarray:
+    """
+    Rotate slightly skewed text back to horizontal
+
+    Candidate angles are scored on a downscaled copy by how sharply the
+    row profile separates text lines from the gaps between them.
+    """
+    small, _ = _downscale(gray, 600)
+    _, ink = cv2.threshold(small, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    center = (small.shape[1] / 2, small.shape[0] / 2)
+
+    max_angle = settings['maxSkewAngle']
+    best_angle, best_score = 0.0, None
+    for angle in np.arange(-max_angle, max_angle + 0.01, 0.5):
+        matrix = cv2.getRotationMatrix2D(center, float(angle), 1.0)
+        rotated = cv2.warpAffine(ink, matrix, (small.shape[1], small.shape[0]), flags=cv2.INTER_NEAREST)
+        score = float(np.var(rotated.sum(axis=1, dtype=np.float64)))
+        if best_score is None or score > best_score:
+            best_angle, best_score = float(angle), score
+
+    if abs(best_angle) < 0.5:
+        return gray
+
+    height, width = gray.shape[:2]
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), best_angle, 1.0)
+    return cv2.warpAffine(gray, matrix, (width, height), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+
+
+def denoise(gray: np.ndarray, settings: Dict) -> np.ndarray:
+    """Remove speckle noise with a median filter"""
+    return cv2.medianBlur(gray, 5)
+
+
+def threshold(gray: np.ndarray, settings: Dict) -> np.ndarray:
+    """Binarize with an adaptive Gaussian threshold"""
+    return cv2.adaptiveThreshold(
+        gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2
+    )
+
+
+def close(gray: np.ndarray, settings: Dict) -> np.ndarray:
+    """Morphological close to join broken strokes"""
+    kernel = np.ones((settings['closeKernel'], settings['closeKernel']), np.uint8)
+    return cv2.morphologyEx(gray, cv2.MORPH_CLOSE, kernel)
+
+
+# Registry of available stages by name
+STAGES: Dict[str, Callable[[np.ndarray, Dict], np.ndarray]] = {
+    'crop': crop,
+    'resize': resize,
+    'deskew': deskew,
+    'denoise': denoise,
+    'threshold': threshold,
+    'close': close,
+}
+
+
+class PreprocessingPipeline:
+    """Ordered list of named preprocessing stages"""
+
+    def __init__(self, stages: List[str]):
+        """
+        Initialize pipeline
+
+        Args:
+            stages (List[str]): Stage names, applied in order
+
+        Raises:
+            ValueError: If a stage name is unknown
+        """
+        unknown = [name for name in stages if name not in STAGES]
+        if unknown:
+            raise ValueError(f"Unknown preprocessing stage(s): {', '.join(unknown)}. "
+                             f"Available: {', '.join(STAGES)}")
+        self.stages = list(stages)
+
+    @classmethod
+    def parse(cls, spec: str) -> 'PreprocessingPipeline':
+        """
+        Build a pipeline from a comma separated spec such as 'crop,resize,threshold'
+
+        Args:
+            spec (str): Stage names separated by commas; empty means grayscale only
+
+        Returns:
+            PreprocessingPipeline: Parsed pipeline
+        """
+        return cls([name.strip().lower() for name in spec.split(',') if name.strip()])
+
+    @property
+    def spec(self) -> str:
+        """Canonical comma separated form"""
+        return ','.join(self.stages)
+
+    def run(self, image: np.ndarray, settings: Dict, timings: Optional[StageTimings] = None) -> np.ndarray:
+        """
+        Convert to grayscale and apply every stage
+
+        Args:
+            image (np.ndarray): BGR or grayscale image
+            settings (Dict): Stage parameters
+            timings (StageTimings): Receives per-stage wall time
+
+        Returns:
+            np.ndarray: Preprocessed image
+        """
+        with timed(timings, 'preprocess.grayscale'):
+            if len(image.shape) == 3:
+                result = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            else:
+                result = image
+
+        for name in self.stages:
+            with timed(timings, f'preprocess.{name}'):
+                result = STAGES[name](result, settings)
+
+        return result
@@ -0,0 +1,270 @@
+"""
+Request Profiler Module
+Opt-in sampling profiler aggregating cProfile statistics and stack samples of live requests
+"""
+
+import os
+import sys
+import hmac
+import time
+import random
+import marshal
+import logging
+import pstats
+import cProfile
+import threading
+from collections import Counter
+from typing import Dict, List, Optional
+from flask import Flask, Response, g, jsonify, request
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Sort keys accepted by the top-N view, mapped to pstats tuple positions
+SORT_KEYS = {'cumulative': 3, 'tottime': 2, 'calls': 1}
+
+# Routes never sampled (the profiler's own endpoints and metrics scrapes)
+EXCLUDED_PREFIXES = ('/debug/profile', '/metrics', '/health')
+
+
+class RequestProfiler:
+    """Profiles a random sample of requests, one at a time, into aggregate profiles"""
+
+    def __init__(self, enabled: Optional[bool] = None, sample_rate: Optional[float] = None,
+                 token: Optional[str] = None, interval: Optional[float] = None,
+                 routes: Optional[List[str]] = None):
+        """
+        Initialize profiler configuration
+
+        Args:
+            enabled (bool): Install the profiler at all; nothing is hooked otherwise
+            sample_rate (float): Share of requests profiled, between 0 and 1
+            token (str): Secret required to read or reset profiles
+            interval (float): Seconds between stack samples of a profiled request
+            routes (List[str]): Route templates eligible for sampling, all when empty
+        """
+        self.enabled = enabled if enabled is not None else os.getenv('PROFILER_ENABLED', 'false').lower() == 'true'
+        self.sample_rate = sample_rate if sample_rate is not None else float(os.getenv('PROFILER_SAMPLE_RATE', 0.01))
+        self.token = token if token is not None else os.getenv('PROFILER_TOKEN', '')
+        self.interval = interval if interval is not None else float(os.getenv('PROFILER_INTERVAL', 0.005))
+        if routes is None:
+            routes = [route.strip() for route in os.getenv('PROFILER_ROUTES', '').split(',') if route.strip()]
+        self.routes = set(routes)
+
+        # Only one request is profiled at a time; cProfile cannot nest
+        self._busy = threading.Lock()
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._stacks = Counter()
+        self._requests = Counter()
+        self._active_thread = None
+        self._wakeup = threading.Event()
+        self._sampler = None
+
+    def init_app(self, app: Flask):
+        """
+        Install request hooks and the /debug/profile endpoints
+
+        Nothing is installed unless the profiler is enabled with a token,
+        so a disabled profiler costs nothing per request.
+        """
+        if not self.enabled:
+            return
+        if not self.token:
+            logger.warning("PROFILER_ENABLED is set without PROFILER_TOKEN; profiler not installed")
+            return
+
+        app.before_request(self._before_request)
+        app.teardown_request(self._teardown_request)
+        app.add_url_rule('/debug/profile', 'profile_top', self._guarded(self.top_view), methods=['GET'])
+        app.add_url_rule('/debug/profile', 'profile_reset', self._guarded(self.reset_view), methods=['DELETE'])
+        app.add_url_rule('/debug/profile.pstats', 'profile_pstats', self._guarded(self.pstats_view), methods=['GET'])
+        app.add_url_rule('/debug/profile.collapsed', 'profile_collapsed', self._guarded(self.collapsed_view),
+                         methods=['GET'])
+        logger.info(f"Request profiler sampling {self.sample_rate:.2%} of requests")
+
+    def _guarded(self, view):
+        """Wrap a view so it requires the profiler token"""
+        def guarded_view():
+            supplied = request.headers.get('X-Profiler-Token', '')
+            authorization = request.headers.get('Authorization', '')
+            if authorization.startswith('Bearer '):
+                supplied = authorization[len('Bearer '):]
+            if not hmac.compare_digest(supplied.encode(), self.token.encode()):
+                return jsonify({
+                    'success': False,
+                    'message': 'Invalid or missing profiler token'
+                }), 401
+            return view()
+        return guarded_view
+
+    def _should_sample(self) -> bool:
+        """Whether the current request is picked for profiling"""
+        if request.path.startswith(EXCLUDED_PREFIXES) or random.random() >= self.sample_rate:
+            return False
+        if self.routes and (request.url_rule is None or request.url_rule.rule not in self.routes):
+            return False
+        # Skip rather than wait while another request is being profiled
+        return self._busy.acquire(blocking=False)
+
+    def _before_request(self):
+        if not self._should_sample():
+            return
+
+        self._ensure_sampler()
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as e:
+            # Another profiling tool is active in this interpreter
+            logger.warning(f"Could not start request profile: {str(e)}")
+            self._busy.release()
+            return
+
+        g.profiler_profile = profile
+        g.profiler_start = time.perf_counter()
+        self._active_thread = threading.get_ident()
+        self._wakeup.set()
+
+    def _teardown_request(self, error=None):
+        profile = g.pop('profiler_profile', None)
+        if profile is None:
+            return
+
+        try:
+            profile.disable()
+            self._active_thread = None
+            route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            stats = pstats.Stats(profile)
+            with self._lock:
+                if route in self._stats:
+                    self._stats[route].add(stats)
+                else:
+                    self._stats[route] = stats
+                self._requests[route] += 1
+            logger.debug(f"Profiled {request.method} {route} in "
+                         f"{(time.perf_counter() - g.pop('profiler_start')) * 1000:.1f}ms")
+        finally:
+            self._busy.release()
+
+    def _ensure_sampler(self):
+        """Start the stack sampler thread on first use"""
+        if self._sampler is None or not self._sampler.is_alive():
+            self._sampler = threading.Thread(target=self._sample_stacks, name='request-profiler', daemon=True)
+            self._sampler.start()
+
+    def _sample_stacks(self):
+        """Record the stack of the profiled request every interval"""
+        while True:
+            thread_id = self._active_thread
+            if thread_id is None:
+                # Re-check after clearing so a wake-up in between is not lost
+                self._wakeup.clear()
+                if self._active_thread is None:
+                    self._wakeup.wait()
+                continue
+
+            frame = sys._current_frames().get(thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if frames:
+                stack = ';'.join(reversed(frames))
+                with self._lock:
+                    self._stacks[stack] += 1
+            time.sleep(self.interval)
+
+    def _combined_stats(self, route: Optional[str] = None) -> pstats.Stats:
+        """Aggregate profile of one route template, or of all routes"""
+        combined = pstats.Stats()
+        with self._lock:
+            for name, stats in self._stats.items():
+                if route is None or name == route:
+                    combined.add(stats)
+        return combined
+
+    def top(self, limit: int = 30, sort: str = 'cumulative', route: Optional[str] = None) -> List[Dict]:
+        """
+        Most expensive functions across the sampled requests
+
+        Args:
+            limit (int): Number of functions returned
+            sort (str): 'cumulative', 'tottime' or 'calls'
+            route (str): Restrict to one route template
+
+        Returns:
+            List[Dict]: Functions with call counts and times in milliseconds
+
+        Raises:
+            ValueError: If the sort key is unknown
+        """
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Unknown sort key: {sort}. Available: {', '.join(SORT_KEYS)}")
+
+        position = SORT_KEYS[sort]
+        entries = sorted(self._combined_stats(route).stats.items(),
+                         key=lambda item: item[1][position], reverse=True)[:limit]
+        return [{
+            'function': f"{name} ({filename}:{line})",
+            'calls': calls,
+            'primitiveCalls': primitive_calls,
+            'totalMs': round(total_time * 1000, 3),
+            'cumulativeMs': round(cumulative_time * 1000, 3),
+        } for (filename, line, name), (primitive_calls, calls, total_time, cumulative_time, _) in entries]
+
+    def collapsed(self) -> str:
+        """Sampled stacks in the collapsed format used by flamegraph tools"""
+        with self._lock:
+            stacks = list(self._stacks.items())
+        return ''.join(f"{stack} {count}\n" for stack, count in sorted(stacks))
+
+    def reset(self):
+        """Discard all aggregated profiles"""
+        with self._lock:
+            self._stats.clear()
+            self._stacks.clear()
+            self._requests.clear()
+
+    def top_view(self):
+        """GET /debug/profile: top-N functions as JSON"""
+        try:
+            functions = self.top(limit=int(request.args.get('limit', 30)),
+                                 sort=request.args.get('sort', 'cumulative'),
+                                 route=request.args.get('route'))
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': str(e)
+            }), 400
+
+        with self._lock:
+            requests_profiled = dict(self._requests)
+        return jsonify({
+            'success': True,
+            'data': {
+                'sampleRate': self.sample_rate,
+                'requestsProfiled': requests_profiled,
+                'functions': functions
+            }
+        })
+
+    def reset_view(self):
+        """DELETE /debug/profile: start a fresh aggregation window"""
+        self.reset()
+        return jsonify({
+            'success': True,
+            'message': 'Profiles cleared'
+        })
+
+    def pstats_view(self):
+        """GET /debug/profile.pstats: aggregate profile loadable with pstats or snakeviz"""
+        stats = self._combined_stats(request.args.get('route'))
+        return Response(marshal.dumps(stats.stats), mimetype='application/octet-stream',
+                        headers={'Content-Disposition': 'attachment; filename=profile.pstats'})
+
+    def collapsed_view(self):
+        """GET /debug/profile.collapsed: stack samples for flamegraph.pl or speedscope"""
+        return Response(self.collapsed(), mimetype='text/plain',
+                        headers={'Content-Disposition': 'attachment; filename=profile.collapsed'})
@@ -0,0 +1,261 @@
+"""
+Receipt Layout Module
+Rebuilds text lines from Tesseract word boxes and reads totals and line items by position
+"""
+
+import re
+from typing import Callable, Dict, List, Optional
+
+# Columns of Tesseract's TSV output (image_to_data / GetTSVText)
+TSV_COLUMNS = ['level', 'page_num', 'block_num', 'par_num', 'line_num', 'word_num',
+               'left', 'top', 'width', 'height', 'conf', 'text']
+
+# Tesseract's result level for single words
+WORD_LEVEL = 5
+
+# Line labels, matched against upper-cased line text
+SUBTOTAL_LABEL = re.compile(r'\bSUB\s*-?\s*TOTAL\b')
+TAX_LABEL = re.compile(r'\b(?:TAX|VAT|GST|HST|PST)\b')
+TOTAL_LABEL = re.compile(r'\b(?:GRAND\s+)?TOTAL\b|\b(?:AMOUNT|BALANCE)\s+DUE\b')
+NOT_TOTAL_LABEL = re.compile(r'\b(?:ITEMS?|SAVINGS?|SAVED|QTY|DISCOUNT)\b')
+PAYMENT_LABEL = re.compile(r'\b(?:CHANGE|CASH|TENDER(?:ED)?|VISA|MASTERCARD|AMEX|DEBIT|CREDIT|CARD|PAID)\b')
+
+# Word that is a price, e.g. 12.50, $12.50, 1,234.50 or 3.99-
+PRICE_WORD = re.compile(r'^\$?-?(\d{1,3}(?:,\d{3})+|\d+)[.,](\d{2})-?$')
+
+
+def parse_tsv(tsv: str) -> Dict[str, List]:
+    """
+    Parse Tesseract TSV output into pytesseract's image_to_data dict layout
+
+    Args:
+        tsv (str): TSV text, with or without the header row
+
+    Returns:
+        Dict[str, List]: Column name to values
+    """
+    data = {column: [] for column in TSV_COLUMNS}
+    for row in tsv.splitlines():
+        fields = row.split('\t')
+        if len(fields) < len(TSV_COLUMNS) - 1 or fields[0] == 'level':
+            continue
+        fields += [''] * (len(TSV_COLUMNS) - len(fields))
+        for column, value in zip(TSV_COLUMNS, fields):
+            data[column].append(value if column == 'text' else float(value) if column == 'conf' else int(value))
+    return data
+
+
+def words_from_data(data: Dict[str, List], page: int = 1) -> List[Dict]:
+    """
+    Collect recognized words with their boxes and confidences
+
+    Args:
+        data (Dict[str, List]): image_to_data style output
+        page (int): Page number recorded on every word
+
+    Returns:
+        List[Dict]: Words with text, conf (0-100), box and line key
+    """
+    words = []
+    for i, text in enumerate(data['text']):
+        text = str(text).strip()
+        if int(data['level'][i]) != WORD_LEVEL or not text:
+            continue
+        words.append({
+            'text': text,
+            'conf': max(float(data['conf'][i]), 0.0),
+            'left': int(data['left'][i]),
+            'top': int(data['top'][i]),
+            'width': int(data['width'][i]),
+            'height': int(data['height'][i]),
+            'line': (page, int(data['block_num'][i]), int(data['par_num'][i]), int(data['line_num'][i])),
+        })
+    return words
+
+
+def build_lines(words: List[Dict]) -> List[Dict]:
+    """
+    Group words into text lines in reading order
+
+    Args:
+        words (List[Dict]): Words from words_from_data
+
+    Returns:
+        List[Dict]: Lines with text, words (left to right), page and box
+    """
+    grouped = {}
+    for word in words:
+        grouped.setdefault(word['line'], []).append(word)
+
+    lines = []
+    for key, line_words in grouped.items():
+        line_words.sort(key=lambda word: word['left'])
+        lines.append({
+            'page': key[0],
+            'text': ' '.join(word['text'] for word in line_words),
+            'words': line_words,
+            'left': min(word['left'] for word in line_words),
+            'top': min(word['top'] for word in line_words),
+            'right': max(word['left'] + word['width'] for word in line_words),
+            'bottom': max(word['top'] + word['height'] for word in line_words),
+        })
+
+    lines.sort(key=lambda line: (line['page'], line['top'], line['left']))
+    return lines
+
+
+def lines_from_text(text: str, page: int = 1) -> List[Dict]:
+    """
+    Build box-less lines from plain text, e.g. a PDF text layer
+
+    Word order stands in for position and confidence is unknown (None).
+
+    Args:
+        text (str): Text with one line per row
+        page (int): Page number recorded on every line
+
+    Returns:
+        List[Dict]: Lines shaped like build_lines output without boxes
+    """
+    lines = []
+    for row in text.splitlines():
+        tokens = row.split()
+        if not tokens:
+            continue
+        words = [{'text': token, 'conf': None, 'left': None, 'top': None, 'width': None,
+                  'height': None, 'line': (page, 0, 0, len(lines))} for token in tokens]
+        lines.append({'page': page, 'text': ' '.join(tokens), 'words': words,
+                      'left': None, 'top': None, 'right': None, 'bottom': None})
+    return lines
+
+
+def lines_to_text(lines: List[Dict], page_count: Optional[int] = None) -> str:
+    """
+    Join lines into plain text, one line per row
+
+    Every word gets 'start' and 'end' character offsets into the returned
+    text. Rows are separated by single newlines and words by single spaces,
+    so whitespace normalization leaves those offsets unchanged.
+
+    Args:
+        lines (List[Dict]): Lines in reading order
+        page_count (int): When given, each page starts with a
+            '--- Page N ---' row, including pages without lines
+
+    Returns:
+        str: Text of all lines
+    """
+    rows, offset = [], 0
+
+    def add_row(row: str) -> int:
+        nonlocal offset
+        start = offset + (1 if rows else 0)
+        rows.append(row)
+        offset = start + len(row)
+        return start
+
+    pages = range(1, page_count + 1) if page_count is not None else [None]
+    for page in pages:
+        if page is not None:
+            add_row(f"--- Page {page} ---")
+        for line in lines:
+            if page is not None and line['page'] != page:
+                continue
+            position = add_row(line['text'])
+            for word in line['words']:
+                word['start'], word['end'] = position, position + len(word['text'])
+                position = word['end'] + 1
+
+    return '\n'.join(rows)
+
+
+def _line_confidence(words: List[Dict]) -> Optional[float]:
+    """Mean word confidence on a 0-1 scale, None when unknown"""
+    confs = [word['conf'] for word in words if word['conf'] is not None]
+    return round(sum(confs) / len(confs) / 100, 3) if confs else None
+
+
+def _rightmost_price(line: Dict, parse_amount: Callable[[str], Optional[float]]) -> Optional[Dict]:
+    """Rightmost price on a line with the words to its left"""
+    for index in range(len(line['words']) - 1, -1, -1):
+        word = line['words'][index]
+        match = PRICE_WORD.match(word['text'])
+        if not match:
+            continue
+        amount = parse_amount(f"{match.group(1).replace(',', '')}.{match.group(2)}")
+        if amount is None:
+            continue
+        return {'amount': amount, 'index': index, 'word': word}
+    return None
+
+
+def _field(line_index: int, line: Dict, price: Dict) -> Dict:
+    """Describe a labelled amount found on a line"""
+    return {
+        'amount': price['amount'],
+        'line': line['text'],
+        'lineIndex': line_index,
+        'confidence': _line_confidence([price['word']]),
+    }
+
+
+def extract_structure(lines: List[Dict], parse_amount: Callable[[str], Optional[float]]) -> Dict:
+    """
+    Identify TOTAL, SUBTOTAL, TAX and line items from line layout
+
+    Labelled amounts are the rightmost price on the labelled line. Items are
+    lines above the first totals line with a description left of a price.
+    When several TOTAL lines exist, the one equal to subtotal plus tax wins,
+    otherwise the last one before the payment lines.
+
+    Args:
+        lines (List[Dict]): Lines in reading order from build_lines or lines_from_text
+        parse_amount (Callable[[str], Optional[float]]): Validates a numeric string
+
+    Returns:
+        Dict: total, subtotal and tax (each None or amount details) and items
+    """
+    subtotal, taxes, totals, items = None, [], [], []
+    totals_started = payment_started = False
+
+    for line_index, line in enumerate(lines):
+        label_text = line['text'].upper()
+        price = _rightmost_price(line, parse_amount)
+
+        if SUBTOTAL_LABEL.search(label_text):
+            totals_started = True
+            if price and subtotal is None:
+                subtotal = _field(line_index, line, price)
+        elif TOTAL_LABEL.search(label_text) and not NOT_TOTAL_LABEL.search(label_text):
+            totals_started = True
+            if price:
+                totals.append((payment_started, _field(line_index, line, price)))
+        elif TAX_LABEL.search(label_text):
+            totals_started = True
+            if price:
+                taxes.append(_field(line_index, line, price))
+        elif PAYMENT_LABEL.search(label_text):
+            totals_started = payment_started = True
+        elif price and not totals_started:
+            description = ' '.join(word['text'] for word in line['words'][:price['index']])
+            if any(char.isalpha() for char in description):
+                items.append({
+                    'description': description,
+                    'amount': price['amount'],
+                    'lineIndex': line_index,
+                    'confidence': _line_confidence(line['words'][:price['index'] + 1]),
+                })
+
+    tax = None
+    if taxes:
+        tax = dict(taxes[0], amount=round(sum(field['amount'] for field in taxes), 2),
+                   line=' | '.join(field['line'] for field in taxes))
+
+    total = None
+    if totals:
+        expected = round(subtotal['amount'] + (tax['amount'] if tax else 0), 2) if subtotal else None
+        consistent = [field for _, field in totals if expected is not None and abs(field['amount'] - expected) <= 0.02]
+        before_payment = [field for after_payment, field in totals if not after_payment]
+        total = (consistent or before_payment or [field for _, field in totals])[-1]
+
+    return {'total': total, 'subtotal': subtotal, 'tax': tax, 'items': items}
@@ -0,0 +1,138 @@
+"""
+Transaction Search Module
+Prefix search tokens maintained on write, and query building for prefix and full-text search
+"""
+
+import re
+from typing import Dict, Iterable, List
+from pymongo import UpdateOne
+
+# Fields of a transaction that are searchable
+SEARCH_FIELDS = ('description', 'merchant', 'tags')
+
+# Shortest and longest indexed prefix; longer query words match on their first MAX_PREFIX characters
+MIN_PREFIX = 2
+MAX_PREFIX = 12
+
+# Search modes accepted by the listing
+PREFIX = 'prefix'
+TEXT = 'text'
+SEARCH_MODES = (PREFIX, TEXT)
+
+# Words: runs of letters and digits in any script
+_WORD_REGEX = re.compile(r'\w+', re.UNICODE)
+
+# Filter matching no document, for searches without any word in them
+NO_MATCH = {'searchTokens': {'$in': []}}
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase words
+
+    Args:
+        text (str): Free text
+
+    Returns:
+        List[str]: Words in order of appearance
+    """
+    return [word.lower() for word in _WORD_REGEX.findall(text or '')]
+
+
+def search_tokens(transaction: Dict) -> List[str]:
+    """
+    Edge n-grams of every word in the searchable fields
+
+    Stored on the document as 'searchTokens' and indexed together with
+    user_id, so a prefix query is an index lookup instead of a regex scan.
+
+    Args:
+        transaction (Dict): Transaction document (or its new field values)
+
+    Returns:
+        List[str]: Sorted distinct prefixes
+    """
+    words = []
+    for field in SEARCH_FIELDS:
+        value = transaction.get(field)
+        if isinstance(value, (list, tuple)):
+            value = ' '.join(str(item) for item in value)
+        words += tokenize(str(value) if value is not None else '')
+
+    tokens = set()
+    for word in words:
+        for length in range(MIN_PREFIX, min(len(word), MAX_PREFIX) + 1):
+            tokens.add(word[:length])
+        # Single characters are kept as whole words only
+        if len(word) < MIN_PREFIX:
+            tokens.add(word)
+    return sorted(tokens)
+
+
+def touches_search_fields(fields: Iterable[str]) -> bool:
+    """Whether an update changes a searchable field"""
+    return any(field in SEARCH_FIELDS for field in fields)
+
+
+def validate_search_mode(mode: str) -> str:
+    """
+    Normalize a search mode name
+
+    Raises:
+        ValueError: If the mode is unknown
+    """
+    normalized = mode.strip().lower()
+    if normalized not in SEARCH_MODES:
+        raise ValueError(f"Unsupported search mode: {mode}. Use one of {', '.join(SEARCH_MODES)}.")
+    return normalized
+
+
+def search_filter(search: str, mode: str = PREFIX) -> Dict:
+    """
+    Query filter for a search string
+
+    In prefix mode every query word must be a prefix of some word in the
+    transaction. Text mode uses the collection's text index and is ranked
+    by text score; it matches whole (stemmed) words only.
+
+    Args:
+        search (str): User search input
+        mode (str): 'prefix' or 'text'
+
+    Returns:
+        Dict: Filter to merge into the listing query; matches nothing when
+            the search contains no words (e.g. only punctuation)
+    """
+    terms = sorted({word[:MAX_PREFIX] for word in tokenize(search)})
+    if not terms:
+        return dict(NO_MATCH)
+
+    if mode == TEXT:
+        return {'$text': {'$search': search}}
+    return {'searchTokens': {'$all': terms}}
+
+
+def backfill_search_tokens(collection, batch_size: int = 1000) -> int:
+    """
+    Store searchTokens on transactions saved before search indexing
+
+    Such transactions are invisible to prefix search until backfilled.
+
+    Args:
+        collection: pymongo transactions collection
+        batch_size (int): Updates sent per bulk write
+
+    Returns:
+        int: Number of transactions updated
+    """
+    updated = 0
+    batch = []
+    for transaction in collection.find({'searchTokens': {'$exists': False}},
+                                       {field: 1 for field in SEARCH_FIELDS}):
+        batch.append(UpdateOne({'_id': transaction['_id']}, {'$set': {'searchTokens': search_tokens(transaction)}}))
+        if len(batch) == batch_size:
+            updated += collection.bulk_write(batch, ordered=False).modified_count
+            batch = []
+    if batch:
+        updated += collection.bulk_write(batch, ordered=False).modified_count
+    return updated
@@ -0,0 +1,143 @@
+"""
+Transaction Statistics Module
+Dashboard statistics computed server-side in a single MongoDB aggregation
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Period bucket keys; ISO week-numbering year and week for weeks
+PERIOD_FORMATS = {
+    'day': '%Y-%m-%d',
+    'week': '%G-W%V',
+    'month': '%Y-%m',
+    'year': '%Y',
+}
+
+
+def _amount_if(transaction_type: str) -> Dict:
+    """Expression summing the amount of one transaction type only"""
+    return {'$cond': [{'$eq': ['$type', transaction_type]}, '$amount', 0]}
+
+
+def build_stats_pipeline(user_id: str, start_date: Optional[datetime] = None,
+                         end_date: Optional[datetime] = None, period: str = 'month') -> List[Dict]:
+    """
+    Aggregation pipeline producing every dashboard statistic in one result
+
+    The leading $match on user_id and date is served by the
+    (user_id, date) index; $facet then groups the matched transactions
+    by type, by category and by period in the same pass.
+
+    Args:
+        user_id (str): Owner of the transactions
+        start_date (datetime): Inclusive lower date bound
+        end_date (datetime): Inclusive upper date bound
+        period (str): 'day', 'week', 'month' or 'year'
+
+    Returns:
+        List[Dict]: Pipeline for collection.aggregate
+
+    Raises:
+        ValueError: If the period is unknown
+    """
+    if period not in PERIOD_FORMATS:
+        raise ValueError(f"Unsupported period: {period}. Use one of {', '.join(PERIOD_FORMATS)}.")
+
+    match = {'user_id': user_id}
+    if start_date or end_date:
+        match['date'] = {}
+        if start_date:
+            match['date']['$gte'] = start_date
+        if end_date:
+            match['date']['$lte'] = end_date
+
+    return [
+        {'$match': match},
+        {'$facet': {
+            'byType': [
+                {'$group': {'_id': '$type', 'total': {'$sum': '$amount'}, 'count': {'$sum': 1},
+                            'average': {'$avg': '$amount'}}},
+                {'$sort': {'_id': 1}},
+            ],
+            'byCategory': [
+                {'$group': {'_id': {'type': '$type', 'category': '$category'},
+                            'total': {'$sum': '$amount'}, 'count': {'$sum': 1}}},
+                {'$sort': {'total': -1}},
+            ],
+            'byPeriod': [
+                {'$group': {'_id': {'$dateToString': {'format': PERIOD_FORMATS[period], 'date': '$date'}},
+                            'income': {'$sum': _amount_if('income')},
+                            'expense': {'$sum': _amount_if('expense')},
+                            'count': {'$sum': 1}}},
+                {'$sort': {'_id': 1}},
+            ],
+        }},
+    ]
+
+
+def get_transaction_stats(collection, user_id: str, start_date: Optional[datetime] = None,
+                          end_date: Optional[datetime] = None, period: str = 'month') -> Dict:
+    """
+    Totals by type, by category and by period with a running balance
+
+    Args:
+        collection: pymongo transactions collection
+        user_id (str): Owner of the transactions
+        start_date (datetime): Inclusive lower date bound
+        end_date (datetime): Inclusive upper date bound
+        period (str): 'day', 'week', 'month' or 'year'
+
+    Returns:
+        Dict: 'summary', 'byType', 'byCategory' and 'byPeriod' statistics
+
+    Raises:
+        ValueError: If the period is unknown
+    """
+    pipeline = build_stats_pipeline(user_id, start_date, end_date, period)
+    facets = next(collection.aggregate(pipeline), {'byType': [], 'byCategory': [], 'byPeriod': []})
+
+    # Transactions without a type are grouped under 'unknown' (JSON keys must be strings)
+    by_type = {
+        row['_id'] if row['_id'] is not None else 'unknown': {
+            'total': round(row['total'], 2),
+            'count': row['count'],
+            'average': round(row['average'] or 0.0, 2),
+        } for row in facets['byType']
+    }
+    income = by_type.get('income', {}).get('total', 0.0)
+    expense = by_type.get('expense', {}).get('total', 0.0)
+
+    by_category = [{
+        'type': row['_id'].get('type'),
+        'category': row['_id'].get('category'),
+        'total': round(row['total'], 2),
+        'count': row['count'],
+    } for row in facets['byCategory']]
+
+    # Periods are few, so the cumulative balance is summed here rather than in a window stage
+    by_period, balance = [], 0.0
+    for row in facets['byPeriod']:
+        net = row['income'] - row['expense']
+        balance += net
+        by_period.append({
+            'period': row['_id'],
+            'income': round(row['income'], 2),
+            'expense': round(row['expense'], 2),
+            'net': round(net, 2),
+            'count': row['count'],
+            'runningBalance': round(balance, 2),
+        })
+
+    return {
+        'summary': {
+            'totalIncome': round(income, 2),
+            'totalExpense': round(expense, 2),
+            'netBalance': round(income - expense, 2),
+            'transactionCount': sum(row['count'] for row in by_type.values()),
+        },
+        'byType': by_type,
+        'byCategory': by_category,
+        'byPeriod': by_period,
+        'period': period,
+    }